@@ -0,0 +1,161 @@
+import math
+import datetime
+import threading
+from collections import deque
+import market_data
+
+
+class RollingState:
+    # Indicator state for one ticker, advanced one bar at a time in O(1)
+    def __init__(self, ma_window=20, num_std=2, rsi_period=14):
+        self.ma_window = ma_window
+        self.num_std = num_std
+        self.rsi_period = rsi_period
+        self.window = deque(maxlen=ma_window)
+        self.window_sum = 0.0
+        self.window_sumsq = 0.0
+        self.ema = None
+        self.prev_close = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.changes_seen = 0
+        self.last_date = None
+        self.last = None
+        self.previous = None
+        self._saved = None
+
+    def _save(self):
+        # Enough to undo the last bar when it is revised (today's bar during the session)
+        return (deque(self.window, maxlen=self.ma_window), self.window_sum, self.window_sumsq, self.ema,
+                self.prev_close, self.avg_gain, self.avg_loss, self.changes_seen, self.last_date, self.last, self.previous)
+
+    def _restore(self, saved):
+        (self.window, self.window_sum, self.window_sumsq, self.ema, self.prev_close, self.avg_gain,
+         self.avg_loss, self.changes_seen, self.last_date, self.last, self.previous) = saved
+
+    def update(self, date, close):
+        if self.last_date is not None and date == self.last_date and self._saved is not None:
+            self._restore(self._saved)
+        elif self.last_date is not None and date < self.last_date:
+            return self.last
+        self._saved = self._save()
+
+        close = float(close)
+        if len(self.window) == self.ma_window:
+            dropped = self.window[0]
+            self.window_sum -= dropped
+            self.window_sumsq -= dropped * dropped
+        self.window.append(close)
+        self.window_sum += close
+        self.window_sumsq += close * close
+
+        alpha = 2.0 / (self.ma_window + 1)
+        self.ema = close if self.ema is None else self.ema + alpha * (close - self.ema)
+
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            self.changes_seen += 1
+            if self.changes_seen <= self.rsi_period:
+                # Seed with a simple average, then switch to Wilder smoothing
+                self.avg_gain += (gain - self.avg_gain) / self.changes_seen
+                self.avg_loss += (loss - self.avg_loss) / self.changes_seen
+            else:
+                self.avg_gain = (self.avg_gain * (self.rsi_period - 1) + gain) / self.rsi_period
+                self.avg_loss = (self.avg_loss * (self.rsi_period - 1) + loss) / self.rsi_period
+        self.prev_close = close
+
+        ma = lower = upper = rsi = None
+        n = len(self.window)
+        if n == self.ma_window:
+            ma = self.window_sum / n
+            # Sample variance, matching pandas rolling().std()
+            variance = max((self.window_sumsq - self.window_sum * self.window_sum / n) / (n - 1), 0.0)
+            std = math.sqrt(variance)
+            lower = ma - self.num_std * std
+            upper = ma + self.num_std * std
+        if self.changes_seen >= self.rsi_period:
+            if self.avg_loss == 0:
+                rsi = 100.0
+            else:
+                rsi = 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+
+        self.previous = self.last
+        self.last = {"date": date, "close": close, "ma": ma, "lower": lower, "upper": upper, "ema": self.ema, "rsi": rsi}
+        self.last_date = date
+        return self.last
+
+
+def evaluate_rules(previous, current):
+    alerts = []
+    if previous is None or current is None:
+        return alerts
+    if previous["ma"] is not None and current["ma"] is not None:
+        if previous["close"] <= previous["ma"] and current["close"] > current["ma"]:
+            alerts.append(("ma_cross_up", "crossed above the 20-day MA"))
+        elif previous["close"] >= previous["ma"] and current["close"] < current["ma"]:
+            alerts.append(("ma_cross_down", "crossed below the 20-day MA"))
+    if current["lower"] is not None and current["close"] < current["lower"]:
+        if previous["lower"] is None or previous["close"] >= previous["lower"]:
+            alerts.append(("below_lower_bb", "dropped below the lower Bollinger Band"))
+    if previous["rsi"] is not None and current["rsi"] is not None:
+        if previous["rsi"] >= 30 > current["rsi"]:
+            alerts.append(("rsi_below_30", f"RSI crossed below 30 ({current['rsi']:.1f})"))
+        elif previous["rsi"] < 30 <= current["rsi"]:
+            alerts.append(("rsi_above_30", f"RSI crossed back above 30 ({current['rsi']:.1f})"))
+    return alerts
+
+
+class AlertEngine:
+    def __init__(self, source=None, warmup_days=120):
+        # source is anything with get(market, ticker, start, end), e.g. a data source or the history cache
+        self.source = source or market_data.history_cache
+        self.warmup_days = warmup_days
+        self.states = {}
+        self.fired = set()
+        self._lock = threading.Lock()
+
+    def feed(self, symbol, df, market):
+        # Feed only bars the state has not seen yet; today's bar may be revised
+        state = self.states.setdefault(symbol, RollingState())
+        price_col = market_data.price_column(market)
+        alerts = []
+        for timestamp, close in df[price_col].items():
+            date = timestamp.date()
+            if state.last_date is not None and date < state.last_date:
+                continue
+            current = state.update(date, close)
+            for rule, message in evaluate_rules(state.previous, current):
+                if (symbol, date, rule) in self.fired:
+                    continue
+                self.fired.add((symbol, date, rule))
+                alerts.append((symbol, date, message))
+        return alerts
+
+    def check(self, symbols, today=None):
+        # symbols is a list of (market, ticker); returns newly fired (symbol, date, message)
+        today = today or datetime.date.today()
+        alerts = []
+        with self._lock:
+            for market, ticker in symbols:
+                state = self.states.get((market, ticker))
+                if state is None or state.last_date is None:
+                    start = today - datetime.timedelta(days=self.warmup_days)
+                    warming = True
+                else:
+                    start = state.last_date
+                    warming = False
+                try:
+                    df = self.source.get(market, ticker, start, today)
+                except Exception as e:
+                    print(f"Error fetching {ticker}: {e}")
+                    continue
+                if df.empty:
+                    continue
+                fired = self.feed((market, ticker), df, market)
+                if warming:
+                    # Only report what happened on the latest bar after a cold start
+                    last_date = self.states[(market, ticker)].last_date
+                    fired = [alert for alert in fired if alert[1] == last_date]
+                alerts.extend(fired)
+        return alerts
@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import time
+import zlib
+import shutil
+import argparse
+import platform
+import datetime
+import tempfile
+import statistics
+
+# Headless by default: no display and no network are needed
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QTWEBENGINE_CHROMIUM_FLAGS", "--no-sandbox")
+
+import numpy as np
+import pandas as pd
+from PySide6.QtWidgets import QApplication
+import market_data
+import alerts
+import main as stock_app
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# About 2,500 KRX tickers in total, split roughly like the real listings
+KRX_UNIVERSE_SIZES = {"KOSPI": 950, "KOSDAQ": 1550}
+END_DATE = datetime.date(2024, 12, 31)
+# Seconds per synthetic scan request, spaced per provider like the real limiters (KRX at half the US rate)
+SCAN_LATENCY = {"KRX": 0.01, "US": 0.005}
+
+
+def seed_for(*parts):
+    return zlib.crc32("|".join(str(part) for part in parts).encode("utf-8"))
+
+
+def make_universe(market):
+    # KRX is generated; US markets use the shipped listings, or a synthetic list of the same size
+    if market in market_data.KRX_MARKETS:
+        offset = 0 if market == "KOSPI" else KRX_UNIVERSE_SIZES["KOSPI"]
+        return [(f"종목{offset + i:04d}", f"{100000 + offset + i:06d}") for i in range(KRX_UNIVERSE_SIZES[market])]
+    csv_file, symbol_col, name_col = market_data.listing_csv(market)
+    path = os.path.join(REPO_DIR, csv_file)
+    if os.path.exists(path):
+        df = pd.read_csv(path).dropna(subset=[symbol_col, name_col])
+        df = df[df[symbol_col].str.match(r'^[A-Z]+$')]
+        return list(zip(df[name_col], df[symbol_col]))
+    size = 2887 if market == "NYSE" else 5162
+    return [(f"Company {i}", "".join(chr(65 + (i // 26 ** k) % 26) for k in range(4))) for i in range(size)]
+
+
+def make_ohlcv(market, ticker, start, end):
+    # Deterministic random walk per ticker with the provider's column layout
+    origin = pd.Timestamp("2000-01-03")
+    dates = pd.bdate_range(max(pd.Timestamp(start), origin), pd.Timestamp(end))
+    # Every series is drawn from a fixed origin, so overlapping ranges return the same bars
+    offset = int(np.busday_count(origin.date(), dates[0].date())) if len(dates) else 0
+    total = offset + len(dates)
+    provider = market_data.provider_for_market(market)
+
+    def draw(field):
+        return np.random.default_rng(seed_for(provider, ticker, field))
+
+    base = 10000 if market in market_data.KRX_MARKETS else 50
+    closes = base * np.exp(np.cumsum(draw("close").normal(0.0003, 0.02, total)))[offset:]
+    opens = closes * np.exp(draw("open").normal(0, 0.005, total)[offset:])
+    highs = np.maximum(opens, closes) * (1 + np.abs(draw("high").normal(0, 0.01, total)[offset:]))
+    lows = np.minimum(opens, closes) * (1 - np.abs(draw("low").normal(0, 0.01, total)[offset:]))
+    volumes = draw("volume").integers(10_000, 5_000_000, total)[offset:]
+    if market in market_data.KRX_MARKETS:
+        df = pd.DataFrame({'시가': opens.round().astype(np.int64), '고가': highs.round().astype(np.int64),
+                           '저가': lows.round().astype(np.int64), '종가': closes.round().astype(np.int64),
+                           '거래량': volumes}, index=dates)
+        df['등락률'] = df['종가'].pct_change().fillna(0) * 100
+        df.index.name = '날짜'
+        return df
+    return pd.DataFrame({'Open': opens, 'High': highs, 'Low': lows, 'Close': closes, 'Volume': volumes,
+                         'Dividends': 0.0, 'Stock Splits': 0.0}, index=dates)
+
+
+def make_panel(market, tickers, start, end):
+    # Whole-market (dates x tickers) closes and volumes, drawn in one go
+    dates = pd.bdate_range(pd.Timestamp(start), pd.Timestamp(end))
+    rng = np.random.default_rng(seed_for(market, "panel", start, end))
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (len(dates), len(tickers))), axis=0))
+    volumes = rng.integers(10_000, 5_000_000, (len(dates), len(tickers))).astype(float)
+    return pd.DataFrame(closes, index=dates, columns=tickers), pd.DataFrame(volumes, index=dates, columns=tickers)
+
+
+class SyntheticDataSource(market_data.LocalDataSource):
+    def __init__(self, scan_limit=100):
+        super().__init__(market_data.HistoryCache(fetcher=make_ohlcv))
+        self.scan_limit = scan_limit
+        self.universes = {}
+        self.scan_limiters = {provider: market_data.RateLimiter(1 / latency) for provider, latency in SCAN_LATENCY.items()}
+
+    def reset_cache(self):
+        # A cold history cache, so a scan does the fetch work again instead of slicing cached frames
+        self.cache = market_data.HistoryCache(fetcher=make_ohlcv)
+
+    def symbols(self, market):
+        if market not in self.universes:
+            self.universes[market] = make_universe(market)
+        return self.universes[market]
+
+    def quote(self, market, ticker):
+        return market_data.fetch_quote(market, ticker, self.cache)
+
+    def snapshot(self, symbols):
+        return {(market, ticker): self.quote(market, ticker) for market, ticker in symbols}
+
+    def breadth(self, market):
+        if market not in self.breadth_stores:
+            # Stored under the benchmark's scratch directory
+            self.breadth_stores[market] = market_data.BreadthStore(market, fetcher=self.market_snapshots)
+        return self.breadth_stores[market].update(END_DATE)
+
+    def market_snapshots(self, market, start, end):
+        tickers = [ticker for name, ticker in self.symbols(market)]
+        closes, volumes = make_panel(market, tickers, start, end)
+        return {day.date(): pd.DataFrame({"close": closes.loc[day], "volume": volumes.loc[day]}) for day in closes.index}
+
+    def profiles(self, symbols):
+        names = {}
+        for market in set(market for market, ticker in symbols):
+            names.update({(market, ticker): name for name, ticker in self.symbols(market)})
+        return {symbol: {"name": names.get(symbol, symbol[1]), "sector": "Synthetic"} for symbol in symbols}
+
+    def scan_fetch(self, market, ticker, start, end):
+        self.scan_limiters[market_data.provider_for_market(market)].wait()
+        return self.cache.get(market, ticker, start, end)
+
+    def decliners(self, markets, period):
+        # The real scan, with the synthetic history and listings in place of the providers
+        today = datetime.datetime.combine(END_DATE, datetime.time())
+        return market_data.scan_markets(markets, period, self.scan_limit, fetch=self.scan_fetch, lister=self.symbols, today=today)
+
+
+def measure(func, repeat, warmup=1, setup=None):
+    # setup runs before every call, outside the timed region
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return {"median": statistics.median(samples), "min": min(samples), "repeat": repeat}
+
+
+def build_benchmarks(window, source):
+    # Each entry is (name, callable) or (name, callable, untimed setup); the window runs offscreen against the synthetic source
+    history_years = 5
+    krx_df = source.get("KOSPI", "100000", END_DATE - datetime.timedelta(days=365 * history_years), END_DATE)
+    us_df = source.get("NASDAQ", "AAPL", END_DATE - datetime.timedelta(days=365 * history_years), END_DATE)
+    price_col = market_data.price_column("NASDAQ")
+
+    def run_worker(market):
+        worker = stock_app.Worker(market, "1 Month", source)
+        return worker.run
+
+    def update_stock_list(market):
+        def run():
+            window.ui.comboBoxMarket.blockSignals(True)
+            window.ui.comboBoxMarket.setCurrentText(market)
+            window.ui.comboBoxMarket.blockSignals(False)
+            window.update_stock_list()
+        return run
+
+    def filter_stock_list():
+        # Typing into the keyword box on the largest list
+        if window.ui.comboBoxMarket.currentText() != "NASDAQ":
+            update_stock_list("NASDAQ")()
+        for keyword in ["a", "ac", "acq", "", "inc", ""]:
+            window.ui.lineEditKeyWord.setText(keyword)
+
+    def plot(df, market, style):
+        def run():
+            window.combo_chart_style.blockSignals(True)
+            window.combo_chart_style.setCurrentText(style)
+            window.combo_chart_style.blockSignals(False)
+            window.plot_stock_data(df, market)
+        return run
+
+    panel_closes, panel_volumes = make_panel("KOSPI", [ticker for name, ticker in source.symbols("KOSPI")],
+                                             END_DATE - datetime.timedelta(days=370), END_DATE)
+
+    def alert_state():
+        state = alerts.RollingState()
+        for timestamp, close in us_df[price_col].items():
+            state.update(timestamp.date(), close)
+
+    def clear_breadth_store():
+        shutil.rmtree("breadth_bench", ignore_errors=True)
+
+    benchmarks = []
+    for market in market_data.KRX_MARKETS + market_data.US_MARKETS:
+        benchmarks.append((f"scan.{market}", run_worker(market), source.reset_cache))
+    benchmarks.append(("scan.all_markets", run_worker("All Markets"), source.reset_cache))
+    for market in market_data.KRX_MARKETS + market_data.US_MARKETS:
+        benchmarks.append((f"update_stock_list.{market}", update_stock_list(market)))
+    benchmarks += [
+        ("filter_stock_list.NASDAQ", filter_stock_list),
+        ("populate_history_table.KOSPI_5y", lambda: window.populate_history_table(krx_df)),
+        ("populate_history_table.NASDAQ_5y", lambda: window.populate_history_table(us_df)),
+        ("indicators.rsi", lambda: window.calculate_rsi(us_df, price_col=price_col)),
+        ("indicators.macd", lambda: window.calculate_macd(us_df, price_col=price_col)),
+        ("indicators.bollinger", lambda: window.calculate_bollinger_bands(us_df, price_col=price_col)),
+        ("indicators.all", lambda: window.compute_indicators(us_df, "NASDAQ")),
+        ("indicators.rolling_state", alert_state),
+        ("breadth.daily_metrics.KOSPI", lambda: market_data.breadth_metrics(panel_closes.iloc[-252:], panel_volumes.iloc[-252:])),
+        ("breadth.store_build.KOSPI", lambda: market_data.BreadthStore("KOSPI", root="breadth_bench", fetcher=source.market_snapshots)
+         .update(END_DATE), clear_breadth_store),
+        ("resample.weekly", lambda: market_data.resample_ohlcv(us_df, "NASDAQ", "W-FRI")),
+        ("resample.monthly", lambda: market_data.resample_ohlcv(us_df, "NASDAQ", "ME")),
+        ("plot_stock_data.line", plot(us_df, "NASDAQ", "Line")),
+        ("plot_stock_data.candlestick", plot(us_df, "NASDAQ", "Candlestick")),
+        ("plot_stock_data.ohlc", plot(us_df, "NASDAQ", "OHLC")),
+    ]
+    return benchmarks
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = result["median"] / previous["median"] if previous["median"] else float("inf")
+        result["baseline_median"] = previous["median"]
+        result["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline performance benchmarks on synthetic market data")
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="JSON baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging, 0.2 = 20%%")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="run only benchmarks whose name contains this text")
+    args = parser.parse_args()
+    baseline_path = os.path.abspath(args.baseline)
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    # Run from a scratch directory so the window gets a fresh watchlist and no selected.json to migrate
+    workdir = tempfile.mkdtemp(prefix="stock_works_bench_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        app = QApplication.instance() or QApplication(sys.argv)
+        source = SyntheticDataSource()
+        window = stock_app.MainWindow(data_source=source)
+        window.resize(1302, 741)
+
+        results = {}
+        for name, func, *setup in build_benchmarks(window, source):
+            if args.only and args.only not in name:
+                continue
+            results[name] = measure(func, args.repeat, setup=setup[0] if setup else None)
+            app.processEvents()
+            print(f"{name:40s} median {results[name]['median'] * 1000:10.2f} ms   min {results[name]['min'] * 1000:10.2f} ms")
+        window.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "pandas": pd.__version__,
+                 "numpy": np.__version__, "timestamp": datetime.datetime.now().isoformat(timespec="seconds")},
+        "results": results,
+    }
+
+    exit_code = 0
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in regressions:
+            print(f"REGRESSION {name}: {ratio:.2f}x baseline")
+        if regressions:
+            exit_code = 1
+        else:
+            print("No regressions against baseline.")
+
+    if args.save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {baseline_path}")
+    if output_path:
+        with open(output_path, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
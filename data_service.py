@@ -0,0 +1,221 @@
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import market_data
+
+# Shared fetch/cache process for every desktop client on the desk.
+# Run with: python data_service.py --port 8765
+# and start clients with STOCK_WORKS_DATA_SERVICE=http://<host>:8765
+
+
+class ResponseCache:
+    # Least recently used entries go first past max_entries; expired ones are swept out periodically
+    def __init__(self, max_entries=5000, sweep_interval=60):
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._entries = OrderedDict()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, body, ttl):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + ttl, body)
+            self._entries.move_to_end(key)
+            if now >= self._next_sweep:
+                for expired in [cached for cached, (expires, _) in self._entries.items() if expires < now]:
+                    del self._entries[expired]
+                self._next_sweep = now + self.sweep_interval
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class Coalescer:
+    # Identical requests that arrive while one is in flight wait for its result
+    def __init__(self):
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, func):
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not owner:
+            return future.result()
+        try:
+            future.set_result(func())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+
+class DataService:
+    def __init__(self, source=None):
+        self.source = source or market_data.LocalDataSource()
+        self.responses = ResponseCache()
+        self.coalescer = Coalescer()
+        self.routes = {
+            "/history": self.history,
+            "/quote": self.quote,
+            "/symbols": self.symbols,
+            "/decliners": self.decliners,
+            "/snapshot": self.snapshot,
+            "/profiles": self.profiles,
+            "/breadth": self.breadth,
+        }
+        self.required_params = {
+            "/history": ("market", "ticker", "start", "end"),
+            "/quote": ("market", "ticker"),
+            "/symbols": ("market",),
+            "/decliners": ("markets",),
+            "/snapshot": ("symbols",),
+            "/profiles": ("symbols",),
+            "/breadth": ("market",),
+        }
+
+    def history(self, params):
+        end = market_data.to_date(params["end"])
+        df = self.source.get(params["market"], params["ticker"], params["start"], end)
+        # Closed ranges never change; anything touching an unfinished session is refreshed often
+        ttl = 24 * 3600 if end <= market_data.last_finished_session(params["market"]) else 60
+        return market_data.frame_to_json(df), ttl
+
+    def quote(self, params):
+        return json.dumps(self.source.quote(params["market"], params["ticker"])), 15
+
+    def snapshot(self, params):
+        symbols = [tuple(symbol.split(":", 1)) for symbol in params["symbols"].split(",") if symbol]
+        snapshot = self.source.snapshot(symbols)
+        return json.dumps([{"market": market, "ticker": ticker, "quote": quote} for (market, ticker), quote in snapshot.items()]), 15
+
+    def profiles(self, params):
+        symbols = [tuple(symbol.split(":", 1)) for symbol in params["symbols"].split(",") if symbol]
+        profiles = self.source.profiles(symbols)
+        return json.dumps([{"market": market, "ticker": ticker, "profile": profile} for (market, ticker), profile in profiles.items()],
+                          ensure_ascii=False), 24 * 3600
+
+    def breadth(self, params):
+        return market_data.frame_to_json(self.source.breadth(params["market"])), 300
+
+    def symbols(self, params):
+        return json.dumps(self.source.symbols(params["market"]), ensure_ascii=False), 24 * 3600
+
+    def decliners(self, params):
+        markets = params["markets"].split(",")
+        results = self.source.decliners(markets, params.get("period", "1 Day"))
+        return json.dumps([[name, ticker, float(change), market] for name, ticker, change, market in results], ensure_ascii=False), 300
+
+    def missing_params(self, path, params):
+        return [name for name in self.required_params[path] if not params.get(name)]
+
+    def invalid_params(self, path, params):
+        # Bad values are the client's fault, so they are answered with 400 instead of reaching upstream
+        invalid = []
+        markets = market_data.KRX_MARKETS + market_data.US_MARKETS
+        if "market" in params and params["market"] not in markets:
+            invalid.append("market")
+        if "markets" in params and any(market not in markets for market in params["markets"].split(",")):
+            invalid.append("markets")
+        dates = {}
+        for name in ("start", "end"):
+            if name in params:
+                try:
+                    dates[name] = market_data.to_date(params[name])
+                except ValueError:
+                    invalid.append(name)
+        if len(dates) == 2 and dates["start"] > dates["end"]:
+            invalid.append("start")
+        return invalid
+
+    def handle(self, path, params):
+        key = (path, tuple(sorted(params.items())))
+        body = self.responses.get(key)
+        if body is not None:
+            return body
+
+        def compute():
+            body, ttl = self.routes[path](params)
+            self.responses.put(key, body, ttl)
+            return body
+
+        return self.coalescer.run(key, compute)
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path not in service.routes:
+                self.send_error(404, "Unknown endpoint")
+                return
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            missing = service.missing_params(url.path, params)
+            if missing:
+                self.send_error(400, f"Missing parameter {', '.join(missing)}")
+                return
+            invalid = service.invalid_params(url.path, params)
+            if invalid:
+                self.send_error(400, f"Invalid parameter {', '.join(invalid)}")
+                return
+            try:
+                body = service.handle(url.path, params).encode("utf-8")
+            except Exception as e:
+                self.send_error(502, f"Upstream error: {e}")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            print(f"{self.address_string()} {format % args}")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared market data service for Stock_works clients")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--history-mb", type=int, default=1024, help="memory cap for the shared history cache")
+    args = parser.parse_args()
+
+    source = market_data.LocalDataSource(market_data.HistoryCache(max_bytes=args.history_mb * 1024 * 1024))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(DataService(source)))
+    print(f"Serving market data on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
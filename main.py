@@ -3,16 +3,22 @@ warnings.filterwarnings("ignore", category=UserWarning, module="pykrx")
 import sys
 import re
 import qdarkstyle
-from PySide6.QtWidgets import QApplication, QMainWindow, QTableWidgetItem, QVBoxLayout, QAbstractItemView, QCheckBox, QHBoxLayout
-from PySide6.QtCore import QDate, QThread, Signal, QUrl
+from PySide6.QtWidgets import QApplication, QMainWindow, QTableWidgetItem, QTableView, QVBoxLayout, QAbstractItemView, QCheckBox, QHBoxLayout, QPushButton, QSystemTrayIcon, QStyle, QComboBox, QTableWidget, QWidget, QInputDialog, QListWidgetItem
+from PySide6.QtCore import QDate, QThread, Signal, QUrl, QTimer, Qt, QAbstractTableModel, QModelIndex
 from main_ui import Ui_MainWindow
-from pykrx import stock
-import datetime
 import pandas as pd
-import yfinance as yf
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import json
+from matplotlib.collections import LineCollection, PolyCollection
+import matplotlib.dates as mdates
+from matplotlib.lines import Line2D
+from matplotlib import colormaps
+from matplotlib.colors import to_rgba
+import numpy as np
+from collections import OrderedDict
+import market_data
+import alerts
+import watchlist
 
 class MplCanvas(FigureCanvas):
     def __init__(self, parent=None, width=5, height=4, dpi=100):
@@ -20,93 +26,201 @@ class MplCanvas(FigureCanvas):
         self.axes = fig.add_subplot(111)
         super(MplCanvas, self).__init__(fig)
 
+class SessionCache:
+    # Recently viewed tickers with their indicators and formatted table rows, evicted by total bytes
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)["nbytes"]
+        self.entries[key] = entry
+        self.total_bytes += entry["nbytes"]
+        # Always keep the newest entry, even if it alone is over the limit
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= evicted["nbytes"]
+
+    @staticmethod
+    def estimate_bytes(df, indicators, rows):
+        nbytes = int(df.memory_usage(deep=True).sum())
+        series = list(indicators["ma"].values()) + list(indicators["bb"]) + [indicators["rsi"]] + list(indicators["macd"])
+        nbytes += sum(int(s.memory_usage(deep=True)) for s in series)
+        nbytes += sum(sys.getsizeof(row) + sum(sys.getsizeof(cell) for cell in row) for row in rows)
+        return nbytes
+
+
+class HistoryTableModel(QAbstractTableModel):
+    # Preformatted history rows behind the table view; showing a cached ticker swaps models without creating items
+    def __init__(self, headers=None, rows=None):
+        super().__init__()
+        self.headers = headers or []
+        self.rows = rows if rows is not None else []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.rows[index.row()][index.column()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return super().headerData(section, orientation, role)
+
+    def set_row(self, row, values):
+        # Live mode appends today's bar or revises it in place
+        if row == len(self.rows):
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.rows.append(values)
+            self.endInsertRows()
+        else:
+            self.rows[row] = values
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(values) - 1))
+
+
 class Worker(QThread):
     finished = Signal(object)
 
-    def __init__(self, market, period):
+    def __init__(self, market, period, data_source):
         super().__init__()
         self.market = market
         self.period = period
+        self.data_source = data_source
 
     def run(self):
-        today = datetime.datetime.now()
-        if self.period == "1 Day":
-            start_date = today - datetime.timedelta(days=1)
-        elif self.period == "1 Week":
-            start_date = today - datetime.timedelta(weeks=1)
-        elif self.period == "1 Month":
-            start_date = today - datetime.timedelta(days=30)
+        if self.market == "All Markets":
+            results = self.data_source.decliners(market_data.KRX_MARKETS + market_data.US_MARKETS, self.period)
         else:
-            start_date = today - datetime.timedelta(days=1)
-
-        start_date_str = start_date.strftime("%Y-%m-%d")
-        end_date_str = today.strftime("%Y-%m-%d")
-
-        results = []
-        if self.market in ["KOSPI", "KOSDAQ"]:
-            tickers = stock.get_market_ticker_list(today.strftime("%Y%m%d"), market=self.market)
-            for ticker in tickers[:20]: # Limiting for performance
-                try:
-                    df = stock.get_market_ohlcv(start_date.strftime("%Y%m%d"), today.strftime("%Y%m%d"), ticker)
-                    if not df.empty:
-                        price_change = (df['종가'].iloc[-1] - df['종가'].iloc[0]) / df['종가'].iloc[0] * 100
-                        name = stock.get_market_ticker_name(ticker)
-                        results.append((name, ticker, price_change))
-                except Exception as e:
-                    print(f"Error fetching {ticker}: {e}")
-        elif self.market in ["NYSE", "NASDAQ"]:
-            if self.market == "NYSE":
-                csv_file = "nyse-listed.csv"
-                symbol_col = "ACT Symbol"
-                name_col = "Company Name"
-            else:
-                csv_file = "nasdaq-listed.csv"
-                symbol_col = "Symbol"
-                name_col = "Security Name"
-            try:
-                df_tickers = pd.read_csv(csv_file).dropna(subset=[symbol_col, name_col])
-                # Filter out tickers with non-alphanumeric characters, keeping only uppercase letter tickers
-                df_tickers = df_tickers[df_tickers[symbol_col].str.match(r'^[A-Z]+$')]
-                
-                # Keep fetching until we have 20 results or have tried all tickers
-                while len(results) < 20 and not df_tickers.empty:
-                    sample_size = min(100, len(df_tickers))
-                    for index, row in df_tickers.sample(n=sample_size).iterrows():
-                        ticker = row[symbol_col]
-                        name = row[name_col]
-                        
-                        # Remove the ticker from the list to avoid re-fetching
-                        df_tickers = df_tickers.drop(index)
-
-                        try:
-                            ticker_obj = yf.Ticker(ticker)
-                            df = ticker_obj.history(start=start_date_str, end=end_date_str)
-                            if not df.empty and 'Close' in df.columns and not df['Close'].isnull().all():
-                                if len(df['Close']) > 1:
-                                    price_change = (df['Close'].iloc[-1] - df['Close'].iloc[0]) / df['Close'].iloc[0] * 100
-                                    results.append((name, ticker, price_change))
-                                    if len(results) >= 20:
-                                        break 
-                                else:
-                                    print(f"Not enough data for {ticker} to calculate change.")
-                            else:
-                                print(f"No data for {ticker}, possibly delisted.")
-                        except Exception as e:
-                            print(f"Failed to get ticker '{ticker}' reason: {e}")
-                    if len(results) >= 20:
-                        break
-            except FileNotFoundError:
-                print(f"{csv_file} not found.")
-
-        results.sort(key=lambda x: x[2])
+            results = self.data_source.decliners([self.market], self.period)
         self.finished.emit(results)
 
 
+class CompareWorker(QThread):
+    finished = Signal(object)
+
+    def __init__(self, symbols, start_date, end_date, data_source):
+        super().__init__()
+        self.symbols = symbols
+        self.start_date = start_date
+        self.end_date = end_date
+        self.data_source = data_source
+
+    def run(self):
+        frames = self.data_source.get_many(self.symbols, self.start_date, self.end_date)
+        self.finished.emit(frames)
+
+
+class AlertWorker(QThread):
+    finished = Signal(object)
+
+    def __init__(self, engine, symbols):
+        super().__init__()
+        self.engine = engine
+        self.symbols = symbols
+
+    def run(self):
+        self.finished.emit(self.engine.check(self.symbols))
+
+
+class LiveWorker(QThread):
+    bar = Signal(object)
+
+    def __init__(self, feed, interval_ms):
+        super().__init__()
+        self.feed = feed
+        self.interval_ms = interval_ms
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                update = self.feed.poll()
+                if update is not None:
+                    self.bar.emit(update)
+            except Exception as e:
+                print(f"Live feed error: {e}")
+            # Sleep in short steps so stop() does not block the UI for a whole interval
+            for _ in range(max(1, self.interval_ms // 100)):
+                if not self.running:
+                    break
+                self.msleep(100)
+
+    def stop(self):
+        self.running = False
+        self.wait()
+
+
+class SnapshotWorker(QThread):
+    finished = Signal(object)
+
+    def __init__(self, data_source, symbols):
+        super().__init__()
+        self.data_source = data_source
+        self.symbols = symbols
+
+    def run(self):
+        try:
+            self.finished.emit(self.data_source.snapshot(self.symbols))
+        except Exception as e:
+            print(f"Error taking watchlist snapshot: {e}")
+            self.finished.emit({})
+
+
+class QuoteRefreshWorker(QThread):
+    finished = Signal(object)
+
+    def __init__(self, quote_cache, data_source, symbols):
+        super().__init__()
+        self.quote_cache = quote_cache
+        self.data_source = data_source
+        self.symbols = symbols
+
+    def run(self):
+        try:
+            refreshed = self.quote_cache.refresh(self.symbols, self.data_source)
+        except Exception as e:
+            print(f"Error refreshing quotes: {e}")
+            refreshed = []
+        self.finished.emit(refreshed)
+
+
+class BreadthWorker(QThread):
+    finished = Signal(object)
+
+    def __init__(self, data_source, market):
+        super().__init__()
+        self.data_source = data_source
+        self.market = market
+
+    def run(self):
+        try:
+            self.finished.emit(self.data_source.breadth(self.market))
+        except Exception as e:
+            print(f"Error updating breadth for {self.market}: {e}")
+            self.finished.emit(None)
+
+
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, data_source=None):
         super().__init__()
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
+        # Local providers by default, or a shared data service when one is configured
+        self.data_source = data_source or market_data.create_data_source()
         self.ui.comboBoxMarket.currentIndexChanged.connect(self.update_stock_list)
         # Initial call to populate the list when the app starts
         self.update_stock_list()
@@ -124,7 +238,7 @@ class MainWindow(QMainWindow):
         # self.ui.listWidgetStocks.currentItemChanged.connect(lambda: self.update_stock_history(self.ui.listWidgetStocks))
         self.ui.listWidgetStocks.itemClicked.connect(lambda: self.update_stock_history(self.ui.listWidgetStocks))
         # Connect pushButtonReload to update_stock_history
-        self.ui.pushButtonReload.clicked.connect(self.reload_active_stock_history)
+        self.ui.pushButtonReload.clicked.connect(lambda: self.reload_active_stock_history(use_cache=False))
 
         # Connect listWidgetSelectedTickers to update_stock_history
         # self.ui.listWidgetSelectedTickers.currentItemChanged.connect(lambda: self.update_stock_history(self.ui.listWidgetSelectedTickers))
@@ -133,6 +247,16 @@ class MainWindow(QMainWindow):
         # Connect lineEditKeyWord to filter_stock_list
         self.ui.lineEditKeyWord.textChanged.connect(self.filter_stock_list)
 
+        # The history table is a view over the session entry's model, so revisits do not rebuild it
+        self.history_view = QTableView(self.ui.frame_5)
+        self.history_view.setMinimumSize(self.ui.tableWidgetHistory.minimumSize())
+        self.history_view.setMaximumSize(self.ui.tableWidgetHistory.maximumSize())
+        self.history_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.ui.horizontalLayout_3.replaceWidget(self.ui.tableWidgetHistory, self.history_view)
+        self.ui.tableWidgetHistory.hide()
+        self.history_model = None
+        self.clear_history_table()
+
         # Create plot canvases
         self.price_canvas = MplCanvas(self, width=5, height=4, dpi=100)
         self.ui.verticalLayoutPlotPrice.addWidget(self.price_canvas)
@@ -154,12 +278,56 @@ class MainWindow(QMainWindow):
         self.checkbox_layout.addWidget(self.check_macd)
         self.ui.verticalLayout_6.insertLayout(0, self.checkbox_layout)
 
+        # Chart style; bars are drawn at a resolution chosen from the visible range
+        self.combo_chart_style = QComboBox()
+        self.combo_chart_style.addItems(["Line", "Candlestick", "OHLC"])
+        self.checkbox_layout.addWidget(self.combo_chart_style)
+        self.combo_chart_style.currentIndexChanged.connect(self.on_indicator_toggled)
+        self.price_bar_artists = []
+        self.price_bar_timer = QTimer(self)
+        self.price_bar_timer.setSingleShot(True)
+        self.price_bar_timer.setInterval(50)
+        self.price_bar_timer.timeout.connect(self.draw_price_bars)
+        self.price_canvas.mpl_connect('scroll_event', self.zoom_price_chart)
+
         self.check_bb.stateChanged.connect(self.on_indicator_toggled)
         self.check_rsi.stateChanged.connect(self.on_indicator_toggled)
         self.check_macd.stateChanged.connect(self.on_indicator_toggled)
 
         self.current_df = None
         self.current_market = None
+        self.current_ticker = None
+        self.current_indicators = None
+
+        # Recently viewed tickers, with back/forward through the viewing history
+        self.session_cache = SessionCache()
+        self.quote_cache = market_data.QuoteCache()
+        self.quote_worker = None
+        self.pending_quotes = []
+        self.nav_history = []
+        self.nav_index = -1
+        self.pushButtonBack = QPushButton("<")
+        self.pushButtonForward = QPushButton(">")
+        self.pushButtonBack.setMaximumWidth(30)
+        self.pushButtonForward.setMaximumWidth(30)
+        self.ui.horizontalLayout_2.insertWidget(0, self.pushButtonForward)
+        self.ui.horizontalLayout_2.insertWidget(0, self.pushButtonBack)
+        self.pushButtonBack.clicked.connect(lambda: self.navigate_history(-1))
+        self.pushButtonForward.clicked.connect(lambda: self.navigate_history(1))
+
+        # Live mode keeps today's bar updating in place
+        self.check_live = QCheckBox("Live")
+        self.check_simulated = QCheckBox("Simulated feed")
+        self.ui.horizontalLayout_2.addWidget(self.check_live)
+        self.ui.horizontalLayout_2.addWidget(self.check_simulated)
+        self.check_live.stateChanged.connect(self.restart_live_mode)
+        self.check_simulated.stateChanged.connect(self.restart_live_mode)
+        self.live_worker = None
+        self.live_buffer = None
+        self.price_lines = {}
+        self.indicator_artists = {}
+        self.price_bar_state = None
+        self.volume_artist = None
 
         # Connect comboBoxPeriod to period_changed
         self.ui.comboBoxPeriod.currentIndexChanged.connect(self.period_changed)
@@ -170,6 +338,23 @@ class MainWindow(QMainWindow):
         # Connect pushButtonRemoveSelected to remove_selected_ticker
         self.ui.pushButtonRemoveSelected.clicked.connect(self.remove_selected_ticker)
 
+        # Overlay every selected ticker on one rebased chart
+        self.pushButtonCompare = QPushButton("Compare Selected")
+        self.ui.verticalLayout_5.addWidget(self.pushButtonCompare)
+        self.pushButtonCompare.clicked.connect(self.compare_selected_tickers)
+        self.compare_labels = {}
+
+        # Watchlist alerts run on a timer in the background
+        self.check_alerts = QCheckBox("Watchlist Alerts")
+        self.ui.verticalLayout_5.addWidget(self.check_alerts)
+        self.check_alerts.stateChanged.connect(self.toggle_watchlist_alerts)
+        self.alert_engine = alerts.AlertEngine(self.data_source)
+        self.alert_worker = None
+        self.alert_timer = QTimer(self)
+        self.alert_timer.setInterval(5 * 60 * 1000)
+        self.alert_timer.timeout.connect(self.check_watchlist_alerts)
+        self.tray_icon = QSystemTrayIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxInformation), self)
+
         # Setup for Top Decliners tab
         if hasattr(self.ui, 'pushButtonFindDecliners'):
             self.ui.pushButtonFindDecliners.clicked.connect(self.find_top_decliners)
@@ -179,12 +364,61 @@ class MainWindow(QMainWindow):
             self.ui.tableWidgetDecliners.setSelectionBehavior(QAbstractItemView.SelectRows)
             self.ui.tableWidgetDecliners.setSelectionMode(QAbstractItemView.SingleSelection)
 
-        # Load selected tickers from file
+            # Scan every market at once, then narrow the merged ranking per market
+            self.check_all_markets = QCheckBox("All markets")
+            self.ui.horizontalLayout_4.addWidget(self.check_all_markets)
+            self.decliner_filters = {}
+            for market in market_data.KRX_MARKETS + market_data.US_MARKETS:
+                check = QCheckBox(market)
+                check.setChecked(True)
+                check.stateChanged.connect(self.filter_decliners_table)
+                self.ui.horizontalLayout_4.addWidget(check)
+                self.decliner_filters[market] = check
+
+            # Market breadth from cached whole-market daily snapshots, next to the decliners table
+            self.combo_breadth_market = QComboBox()
+            self.combo_breadth_market.addItems(market_data.KRX_MARKETS + market_data.US_MARKETS)
+            self.pushButtonBreadth = QPushButton("Update Breadth")
+            self.ui.horizontalLayout_4.addWidget(self.combo_breadth_market)
+            self.ui.horizontalLayout_4.addWidget(self.pushButtonBreadth)
+            self.pushButtonBreadth.clicked.connect(self.update_market_breadth)
+            self.breadth_canvas = MplCanvas(self, width=5, height=4, dpi=100)
+            self.ui.horizontalLayout_5.insertWidget(1, self.breadth_canvas)
+            self.breadth_worker = None
+
+        # Watchlist groups live in SQLite; the old selected.json is imported on first run
+        self.watchlist = watchlist.WatchlistStore()
+        if self.watchlist.is_empty():
+            self.watchlist.import_json("selected.json", market_data.listing_market_resolver())
+        self.group_layout = QHBoxLayout()
+        self.combo_watchlist_group = QComboBox()
+        self.combo_watchlist_group.addItems(self.watchlist.groups())
+        self.pushButtonNewGroup = QPushButton("New Group")
+        self.group_layout.addWidget(self.combo_watchlist_group)
+        self.group_layout.addWidget(self.pushButtonNewGroup)
+        self.ui.verticalLayout_5.insertLayout(0, self.group_layout)
+        self.combo_watchlist_group.currentIndexChanged.connect(self.load_selected_tickers)
+        self.pushButtonNewGroup.clicked.connect(self.create_watchlist_group)
+
+        # Watchlist tab: one batched quote snapshot for the whole group
+        self.tabWatchlist = QWidget()
+        watchlist_layout = QVBoxLayout(self.tabWatchlist)
+        self.pushButtonSnapshot = QPushButton("Snapshot Quotes")
+        self.tableWidgetWatchlist = QTableWidget()
+        self.tableWidgetWatchlist.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tableWidgetWatchlist.setSelectionBehavior(QAbstractItemView.SelectRows)
+        watchlist_layout.addWidget(self.pushButtonSnapshot)
+        watchlist_layout.addWidget(self.tableWidgetWatchlist)
+        self.ui.tabWidget.addTab(self.tabWatchlist, "Watchlist")
+        self.pushButtonSnapshot.clicked.connect(self.snapshot_watchlist)
+
         self.load_selected_tickers()
 
     def on_indicator_toggled(self):
         if self.current_df is not None and not self.current_df.empty:
-            self.plot_stock_data(self.current_df, self.current_market)
+            # Live bars change the frame, so cached indicators only apply to a static view
+            indicators = self.current_indicators if self.live_buffer is None else None
+            self.plot_stock_data(self.current_df, self.current_market, indicators)
 
     def calculate_rsi(self, df, period=14, price_col='Close'):
         delta = df[price_col].diff()
@@ -207,42 +441,176 @@ class MainWindow(QMainWindow):
         lower_band = rolling_mean - (rolling_std * num_std)
         return upper_band, lower_band
 
-    def save_selected_tickers(self):
-        items = []
-        for i in range(self.ui.listWidgetSelectedTickers.count()):
-            items.append(self.ui.listWidgetSelectedTickers.item(i).text())
-        with open("selected.json", "w") as f:
-            json.dump(items, f)
+    def current_watchlist_group(self):
+        return self.combo_watchlist_group.currentText() or watchlist.DEFAULT_GROUP
+
+    def watchlist_symbols(self):
+        return [(market, ticker) for market, ticker, name in self.watchlist.entries(self.current_watchlist_group())]
 
     def load_selected_tickers(self):
-        try:
-            with open("selected.json", "r") as f:
-                items = json.load(f)
-                self.ui.listWidgetSelectedTickers.addItems(items)
-        except FileNotFoundError:
-            pass # No file to load
+        self.ui.listWidgetSelectedTickers.clear()
+        for market, ticker, name in self.watchlist.entries(self.current_watchlist_group()):
+            item = QListWidgetItem(f"{name} ({ticker})")
+            item.setData(Qt.UserRole, (market, ticker))
+            self.ui.listWidgetSelectedTickers.addItem(item)
+
+    def create_watchlist_group(self):
+        group, ok = QInputDialog.getText(self, "New Group", "Group name:")
+        group = group.strip()
+        if ok and group and self.watchlist.create_group(group):
+            self.combo_watchlist_group.addItem(group)
+            self.combo_watchlist_group.setCurrentText(group)
 
     def add_selected_ticker(self):
         current_item = self.ui.listWidgetStocks.currentItem()
-        if current_item:
-            item_text = current_item.text()
-            # Check if the item already exists in listWidgetSelectedTickers
-            for i in range(self.ui.listWidgetSelectedTickers.count()):
-                if self.ui.listWidgetSelectedTickers.item(i).text() == item_text:
-                    return # Item already exists, do not add
-            self.ui.listWidgetSelectedTickers.addItem(item_text)
-            self.save_selected_tickers()
+        # Placeholder rows such as a missing listing file carry no symbol
+        if current_item and current_item.data(Qt.UserRole):
+            # The item carries the market it was listed under, whatever the combo shows now
+            market, ticker = current_item.data(Qt.UserRole)
+            name = current_item.text().rpartition(" (")[0]
+            if self.watchlist.add(self.current_watchlist_group(), market, ticker, name):
+                item = QListWidgetItem(current_item.text())
+                item.setData(Qt.UserRole, (market, ticker))
+                self.ui.listWidgetSelectedTickers.addItem(item)
 
     def remove_selected_ticker(self):
         current_item = self.ui.listWidgetSelectedTickers.currentItem()
         if current_item:
+            market, ticker = current_item.data(Qt.UserRole)
+            self.watchlist.remove(self.current_watchlist_group(), ticker)
             self.ui.listWidgetSelectedTickers.takeItem(self.ui.listWidgetSelectedTickers.row(current_item))
-            self.save_selected_tickers()
+
+    def snapshot_watchlist(self):
+        symbols = self.watchlist_symbols()
+        if not symbols:
+            return
+        self.snapshot_worker = SnapshotWorker(self.data_source, symbols)
+        self.snapshot_worker.finished.connect(self.update_watchlist_table)
+        self.snapshot_worker.start()
+        self.pushButtonSnapshot.setText("Loading...")
+        self.pushButtonSnapshot.setEnabled(False)
+
+    def update_watchlist_table(self, snapshot):
+        self.pushButtonSnapshot.setText("Snapshot Quotes")
+        self.pushButtonSnapshot.setEnabled(True)
+        entries = self.watchlist.entries(self.current_watchlist_group())
+        table = self.tableWidgetWatchlist
+        table.setSortingEnabled(False)
+        table.clear()
+        table.setColumnCount(7)
+        table.setHorizontalHeaderLabels(["Name", "Ticker", "Market", "Price", "Change", "Change (%)", "Volume"])
+        table.setRowCount(len(entries))
+        for i, (market, ticker, name) in enumerate(entries):
+            table.setItem(i, 0, QTableWidgetItem(name))
+            table.setItem(i, 1, QTableWidgetItem(ticker))
+            table.setItem(i, 2, QTableWidgetItem(market))
+            quote = snapshot.get((market, ticker))
+            if quote is None:
+                continue
+            for j, field in enumerate(["price", "change", "change_pct", "volume"]):
+                # Numeric display data so the columns sort by value
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, round(quote[field], 2))
+                table.setItem(i, j + 3, item)
+        table.setSortingEnabled(True)
+        self.ui.tabWidget.setCurrentWidget(self.tabWatchlist)
+
+    def compare_selected_tickers(self):
+        self.compare_labels = {}
+        for market, ticker, name in self.watchlist.entries(self.current_watchlist_group()):
+            self.compare_labels[(market, ticker)] = f"{name} ({ticker})"
+        if not self.compare_labels:
+            return
+
+        start_date = self.ui.dateEditStart.date().toPython()
+        end_date = self.ui.dateEditEnd.date().toPython()
+        self.compare_worker = CompareWorker(list(self.compare_labels), start_date, end_date, self.data_source)
+        self.compare_worker.finished.connect(self.plot_comparison)
+        self.compare_worker.start()
+        self.pushButtonCompare.setText("Loading...")
+        self.pushButtonCompare.setEnabled(False)
+
+    def plot_comparison(self, frames):
+        self.pushButtonCompare.setText("Compare Selected")
+        self.pushButtonCompare.setEnabled(True)
+        self.ui.tabWidget.setCurrentWidget(self.ui.tabData)
+
+        labeled = {self.compare_labels[symbol]: (symbol[0], df) for symbol, df in frames.items()}
+        rebased = market_data.rebase_closes(labeled)
+        if rebased.empty:
+            self.ui.statusbar.showMessage("No data to compare for the selected tickers.")
+            return
+
+        # Comparison replaces the single ticker view until another ticker is opened
+        self.current_df = None
+        self.restart_live_mode()
+        self.clear_history_table()
+        self.amount_canvas.axes.cla()
+        self.amount_canvas.draw()
+        self.indicator_canvas.setVisible(False)
+
+        # Plot on trading-date positions so weekends and holidays leave no gaps
+        x = np.arange(len(rebased), dtype=float)
+        max_points = max(self.price_canvas.width(), 200)
+        segments = []
+        for column in rebased.columns:
+            y = rebased[column].to_numpy(dtype=float)
+            xs, ys = market_data.downsample_minmax(x, y, max_points)
+            valid = ~np.isnan(ys)
+            segments.append(np.column_stack([xs[valid], ys[valid]]))
+
+        colors = [colormaps["tab20"](i % 20) for i in range(len(segments))]
+        axes = self.price_canvas.axes
+        axes.cla()
+        axes.add_collection(LineCollection(segments, colors=colors, linewidths=1.2))
+        axes.axhline(100, color='gray', linestyle='--', linewidth=0.8)
+        axes.autoscale_view()
+
+        tick_positions = np.linspace(0, len(rebased) - 1, min(8, len(rebased))).astype(int)
+        axes.set_xticks(tick_positions)
+        axes.set_xticklabels([rebased.index[i].strftime("%Y-%m-%d") for i in tick_positions], rotation=30, fontsize=8)
+        handles = [Line2D([], [], color=colors[i], label=str(column)) for i, column in enumerate(rebased.columns)]
+        axes.legend(handles=handles, fontsize=7, ncol=max(1, len(handles) // 10))
+        axes.set_title("Comparison (rebased to 100)")
+        self.price_canvas.draw()
+
+        missing = len(frames) - len(rebased.columns)
+        message = f"Comparing {len(rebased.columns)} tickers from {rebased.index[0].strftime('%Y-%m-%d')}, the first date all of them traded"
+        if missing:
+            message += f" ({missing} without data)"
+        self.ui.statusbar.showMessage(message)
+
+    def toggle_watchlist_alerts(self):
+        if self.check_alerts.isChecked():
+            if QSystemTrayIcon.isSystemTrayAvailable():
+                self.tray_icon.show()
+            self.check_watchlist_alerts()
+            self.alert_timer.start()
+        else:
+            self.alert_timer.stop()
+            self.tray_icon.hide()
+
+    def check_watchlist_alerts(self):
+        if self.alert_worker is not None and self.alert_worker.isRunning():
+            return
+        self.alert_worker = AlertWorker(self.alert_engine, self.watchlist_symbols())
+        self.alert_worker.finished.connect(self.show_watchlist_alerts)
+        self.alert_worker.start()
+
+    def show_watchlist_alerts(self, fired):
+        if not fired:
+            return
+        messages = [f"{ticker} {message} ({date})" for (market, ticker), date, message in fired]
+        self.ui.statusbar.showMessage("; ".join(messages))
+        if self.tray_icon.isVisible():
+            self.tray_icon.showMessage("Watchlist Alerts", "\n".join(messages), QSystemTrayIcon.MessageIcon.Information)
 
     def find_top_decliners(self):
         market = self.ui.comboBoxMarket.currentText()
+        if self.check_all_markets.isChecked():
+            market = "All Markets"
         period = self.ui.comboBoxDeclinersPeriod.currentText()
-        self.worker = Worker(market, period)
+        self.worker = Worker(market, period, self.data_source)
         self.worker.finished.connect(self.update_decliners_table)
         self.worker.start()
         if hasattr(self.ui, 'pushButtonFindDecliners'):
@@ -253,30 +621,111 @@ class MainWindow(QMainWindow):
         if hasattr(self.ui, 'tableWidgetDecliners'):
             self.ui.tableWidgetDecliners.clear()
             self.ui.tableWidgetDecliners.setRowCount(len(results))
-            self.ui.tableWidgetDecliners.setColumnCount(3)
-            self.ui.tableWidgetDecliners.setHorizontalHeaderLabels(["Name", "Ticker", "Change (%)"])
-            for i, (name, ticker, change) in enumerate(results):
+            self.ui.tableWidgetDecliners.setColumnCount(4)
+            self.ui.tableWidgetDecliners.setHorizontalHeaderLabels(["Name", "Ticker", "Change (%)", "Market"])
+            for i, (name, ticker, change, market) in enumerate(results):
                 self.ui.tableWidgetDecliners.setItem(i, 0, QTableWidgetItem(name))
                 self.ui.tableWidgetDecliners.setItem(i, 1, QTableWidgetItem(ticker))
                 self.ui.tableWidgetDecliners.setItem(i, 2, QTableWidgetItem(f"{change:.2f}%"))
+                self.ui.tableWidgetDecliners.setItem(i, 3, QTableWidgetItem(market))
+            self.filter_decliners_table()
         if hasattr(self.ui, 'pushButtonFindDecliners'):
             self.ui.pushButtonFindDecliners.setText("Find Decliners")
             self.ui.pushButtonFindDecliners.setEnabled(True)
 
+    def update_market_breadth(self):
+        if self.breadth_worker is not None and self.breadth_worker.isRunning():
+            return
+        self.breadth_worker = BreadthWorker(self.data_source, self.combo_breadth_market.currentText())
+        self.breadth_worker.finished.connect(self.plot_market_breadth)
+        self.breadth_worker.start()
+        self.pushButtonBreadth.setText("Loading...")
+        self.pushButtonBreadth.setEnabled(False)
+
+    def plot_market_breadth(self, metrics, days=120):
+        self.pushButtonBreadth.setText("Update Breadth")
+        self.pushButtonBreadth.setEnabled(True)
+        figure = self.breadth_canvas.figure
+        figure.clear()
+        if metrics is None or metrics.empty:
+            self.ui.statusbar.showMessage("No breadth data available.")
+            self.breadth_canvas.draw()
+            return
+
+        metrics = metrics.iloc[-days:]
+        market = self.breadth_worker.market
+        ax_ad, ax_hl, ax_ma, ax_vol = figure.subplots(4, 1, sharex=True)
+        net = metrics["advancers"] - metrics["decliners"]
+        ax_ad.bar(metrics.index, net, color=np.where(net >= 0, 'tab:red', 'tab:blue'), alpha=0.4, label='Adv - Dec')
+        ax_ad.plot(metrics.index, net.cumsum(), color='black', label='A/D Line')
+        ax_ad.set_title(f"{market} Breadth", fontsize=9)
+        ax_ad.legend(fontsize=7)
+        ax_hl.plot(metrics.index, metrics["new_highs"], color='tab:red', label='52W Highs')
+        ax_hl.plot(metrics.index, metrics["new_lows"], color='tab:blue', label='52W Lows')
+        ax_hl.legend(fontsize=7)
+        ax_ma.plot(metrics.index, metrics["pct_above_ma20"], label='% > MA20')
+        ax_ma.plot(metrics.index, metrics["pct_above_ma50"], label='% > MA50')
+        ax_ma.axhline(50, color='gray', linestyle='--', linewidth=0.8)
+        ax_ma.legend(fontsize=7)
+        ax_vol.plot(metrics.index, metrics["median_volume"], label='Median Volume')
+        ax_vol.plot(metrics.index, metrics["p90_volume"], label='90th pct Volume')
+        ax_vol.legend(fontsize=7)
+        for axes in (ax_ad, ax_hl, ax_ma, ax_vol):
+            axes.tick_params(labelsize=7)
+        figure.autofmt_xdate()
+        figure.tight_layout()
+        self.breadth_canvas.draw()
+
+        latest = metrics.iloc[-1]
+        self.ui.statusbar.showMessage(
+            f"{market} {metrics.index[-1].strftime('%Y-%m-%d')}: {int(latest['advancers'])} up / {int(latest['decliners'])} down, "
+            f"{int(latest['new_highs'])} new highs / {int(latest['new_lows'])} new lows, "
+            f"{latest['pct_above_ma20']:.1f}% above MA20, {latest['pct_above_ma50']:.1f}% above MA50")
+
+    def filter_decliners_table(self):
+        for row in range(self.ui.tableWidgetDecliners.rowCount()):
+            market_item = self.ui.tableWidgetDecliners.item(row, 3)
+            if market_item is None:
+                continue
+            check = self.decliner_filters.get(market_item.text())
+            self.ui.tableWidgetDecliners.setRowHidden(row, check is not None and not check.isChecked())
+
     def open_naver_finance(self, row, column):
         # The ticker is in the second column (index 1)
         ticker_item = self.ui.tableWidgetDecliners.item(row, 1)
+        market_item = self.ui.tableWidgetDecliners.item(row, 3)
         if ticker_item:
             ticker_code = ticker_item.text()
-            url = f"https://finance.naver.com/item/main.naver?code={ticker_code}"
+            if market_item is not None and market_item.text() in market_data.US_MARKETS:
+                url = f"https://finance.yahoo.com/quote/{ticker_code}"
+            else:
+                url = f"https://finance.naver.com/item/main.naver?code={ticker_code}"
             self.ui.webEngineViewNaver.setUrl(QUrl(url))
 
-    def reload_active_stock_history(self):
+    def reload_active_stock_history(self, use_cache=True):
+        # Back/Forward may have moved away from the list selection; reload what is on screen
+        if self.current_ticker is not None:
+            self.load_stock_history(self.current_market, self.current_ticker, use_cache)
+            return
         if self.ui.tabWidget_2.currentWidget() == self.ui.tabSelected:
             current_list_widget = self.ui.listWidgetSelectedTickers
         else:
             current_list_widget = self.ui.listWidgetStocks
-        self.update_stock_history(current_list_widget)
+        self.update_stock_history(current_list_widget, use_cache)
+
+    @staticmethod
+    def period_start(period, end_date):
+        if period == "1 Year":
+            return end_date.addYears(-1)
+        elif period == "6 Months":
+            return end_date.addMonths(-6)
+        elif period == "1 Month" or period == "1 Months":
+            return end_date.addMonths(-1)
+        elif period == "2 Weeks":
+            return end_date.addDays(-14)
+        elif period == "1 Week":
+            return end_date.addDays(-7)
+        return None
 
     def period_changed(self):
         period = self.ui.comboBoxPeriod.currentText()
@@ -291,22 +740,36 @@ class MainWindow(QMainWindow):
             self.ui.dateEditStart.setEnabled(False)
             self.ui.dateEditEnd.setEnabled(False)
 
-        if period == "1 Year":
-            start_date = end_date.addYears(-1)
-        elif period == "6 Months":
-            start_date = end_date.addMonths(-6)
-        elif period == "1 Month" or period == "1 Months":
-            start_date = end_date.addMonths(-1)
-        elif period == "2 Weeks":
-            start_date = end_date.addDays(-14)
-        elif period == "1 Week":
-            start_date = end_date.addDays(-7)
-        else:
+        start_date = self.period_start(period, end_date)
+        if start_date is None:
             return
 
         self.ui.dateEditStart.setDate(start_date)
         self.reload_active_stock_history()
 
+    def sync_controls(self, key):
+        # Point the market, list selection, period and dates at a revisited entry, so Reload and period changes act on it
+        market, ticker, start, end = key
+        if self.ui.comboBoxMarket.currentText() != market:
+            self.ui.comboBoxMarket.setCurrentText(market)
+        for list_widget in (self.ui.listWidgetStocks, self.ui.listWidgetSelectedTickers):
+            items = list_widget.findItems(f"({ticker})", Qt.MatchEndsWith)
+            if items:
+                list_widget.setCurrentItem(items[0])
+            else:
+                list_widget.clearSelection()
+        start_date, end_date = QDate(start), QDate(end)
+        periods = [self.ui.comboBoxPeriod.itemText(i) for i in range(self.ui.comboBoxPeriod.count())]
+        matching = [period for period in periods if end_date == QDate.currentDate() and self.period_start(period, end_date) == start_date]
+        period = matching[0] if matching else "Custom"
+        self.ui.comboBoxPeriod.blockSignals(True)
+        self.ui.comboBoxPeriod.setCurrentText(period)
+        self.ui.comboBoxPeriod.blockSignals(False)
+        self.ui.dateEditStart.setEnabled(period == "Custom")
+        self.ui.dateEditEnd.setEnabled(period == "Custom")
+        self.ui.dateEditStart.setDate(start_date)
+        self.ui.dateEditEnd.setDate(end_date)
+
     def filter_stock_list(self):
         keyword = self.ui.lineEditKeyWord.text().lower()
         for i in range(self.ui.listWidgetStocks.count()):
@@ -316,16 +779,7 @@ class MainWindow(QMainWindow):
     def close_application(self):
         self.close()
 
-    def get_market_for_ticker(self, ticker):
-        kospi_tickers = stock.get_market_ticker_list(market="KOSPI")
-        if ticker in kospi_tickers:
-            return "KOSPI"
-        kosdaq_tickers = stock.get_market_ticker_list(market="KOSDAQ")
-        if ticker in kosdaq_tickers:
-            return "KOSDAQ"
-        return "Unknown Market"
-
-    def update_stock_history(self, list_widget):
+    def update_stock_history(self, list_widget, use_cache=True):
         if list_widget is None:
             return
 
@@ -335,61 +789,45 @@ class MainWindow(QMainWindow):
 
         self.ui.tabWidget.setCurrentWidget(self.ui.tabData)
 
-        ticker = current_item.text().split("(")[-1].replace(")", "")
-        start_date = self.ui.dateEditStart.date().toString("yyyy-MM-dd")
-        end_date = self.ui.dateEditEnd.date().toString("yyyy-MM-dd")
+        if current_item.data(Qt.UserRole):
+            stored_market, ticker = current_item.data(Qt.UserRole)
+        else:
+            stored_market, ticker = None, current_item.text().split("(")[-1].replace(")", "")
 
-        df = None
-        info = None
-        
         market = self.ui.comboBoxMarket.currentText()
 
-        if list_widget == self.ui.listWidgetSelectedTickers:
-            detected_market = self.get_market_for_ticker(ticker)
-            if detected_market != "Unknown Market":
-                self.ui.comboBoxMarket.setCurrentText(detected_market)
-                market = detected_market
+        if stored_market is not None:
+            self.ui.comboBoxMarket.setCurrentText(stored_market)
+            market = stored_market
+
+        # The list already knows the name, so the quote cache never has to look it up
+        name = current_item.text().rpartition(" (")[0]
+        if name:
+            self.quote_cache.put(market, ticker, {"name": name})
+        self.load_stock_history(market, ticker, use_cache)
+
+    def load_stock_history(self, market, ticker, use_cache=True):
+        df = None
+        key = (market, ticker, self.ui.dateEditStart.date().toPython(), self.ui.dateEditEnd.date().toPython())
+        entry = self.session_cache.get(key) if use_cache else None
+        if entry is not None:
+            self.show_session_entry(key, entry)
+            return
 
         try:
-            if market in ["KOSPI", "KOSDAQ"]:
-                df = stock.get_market_ohlcv(self.ui.dateEditStart.date().toString("yyyyMMdd"), self.ui.dateEditEnd.date().toString("yyyyMMdd"), ticker)
-                if df.empty:
-                    self.ui.statusbar.showMessage(f"No data for {ticker}. It might be delisted or an incorrect ticker.")
-                    return
-                
-                # For KOSPI/KOSDAQ, we can get limited info from pykrx
-                name = stock.get_market_ticker_name(ticker)
-                latest_price = df['종가'].iloc[-1]
-                change = df['종가'].iloc[-1] - df['종가'].iloc[-2] if len(df) > 1 else 0
-                volume = df['거래량'].iloc[-1]
-                status_message = f"{name} ({ticker}) - Market: {market}, Price: {latest_price}, Change: {change}, Volume: {volume}"
-                self.ui.statusbar.showMessage(status_message)
-                
-            elif market in ["NYSE", "NASDAQ"]:
-                ticker_obj = yf.Ticker(ticker)
-                df = ticker_obj.history(start=start_date, end=end_date)
+            if market in ["KOSPI", "KOSDAQ", "NYSE", "NASDAQ"]:
+                df = self.data_source.get(market, ticker, self.ui.dateEditStart.date().toPython(), self.ui.dateEditEnd.date().toPython())
                 if df.empty:
                     self.ui.statusbar.showMessage(f"No data for {ticker}. It might be delisted or an incorrect ticker.")
                     return
 
-                info = ticker_obj.info
-                short_name = info.get('shortName', ticker.split(" (")[0])
-                price = info.get('regularMarketPrice', 'N/A')
-                change = info.get('regularMarketChange', 'N/A')
-                volume = info.get('regularMarketVolume', 'N/A')
-                status_message = f"{short_name} ({ticker}) - Market: {market}, Price: {price}, Change: {change:.2f}, Volume: {volume}"
-                self.ui.statusbar.showMessage(status_message)
-
             if df is not None and not df.empty:
-                self.current_df = df
-                self.current_market = market
-                self.populate_history_table(df)
-                self.plot_stock_data(df, market)
+                entry = self.build_session_entry(df, market, ticker)
+                self.session_cache.put(key, entry)
+                self.show_session_entry(key, entry)
             else:
                 # Clear UI elements if no data is found
-                self.ui.tableWidgetHistory.clear()
-                self.ui.tableWidgetHistory.setRowCount(0)
-                self.ui.tableWidgetHistory.setColumnCount(0)
+                self.clear_history_table()
                 self.price_canvas.axes.cla()
                 self.price_canvas.draw()
                 self.amount_canvas.axes.cla()
@@ -400,49 +838,147 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.ui.statusbar.showMessage(f"Error fetching stock history for {ticker}: {e}")
             # Clear UI elements on error
-            self.ui.tableWidgetHistory.clear()
-            self.ui.tableWidgetHistory.setRowCount(0)
-            self.ui.tableWidgetHistory.setColumnCount(0)
+            self.clear_history_table()
             self.price_canvas.axes.cla()
             self.price_canvas.draw()
             self.amount_canvas.axes.cla()
             self.amount_canvas.draw()
             self.indicator_canvas.setVisible(False)
 
-    def plot_stock_data(self, df, market):
+    def compute_indicators(self, df, market):
+        price_col = '종가' if market in ["KOSPI", "KOSDAQ"] else 'Close'
+        return {
+            "ma": {window: df[price_col].rolling(window=window).mean() for window in (5, 20, 50) if len(df) >= window},
+            "bb": self.calculate_bollinger_bands(df, price_col=price_col),
+            "rsi": self.calculate_rsi(df, price_col=price_col),
+            "macd": self.calculate_macd(df, price_col=price_col),
+        }
+
+    def build_session_entry(self, df, market, ticker):
+        indicators = self.compute_indicators(df, market)
+        headers, rows = self.format_history_rows(df)
+        return {"df": df, "market": market, "ticker": ticker, "indicators": indicators,
+                "model": HistoryTableModel(headers, rows), "nbytes": SessionCache.estimate_bytes(df, indicators, rows)}
+
+    def show_session_entry(self, key, entry, record=True):
+        if record and not (0 <= self.nav_index < len(self.nav_history) and self.nav_history[self.nav_index] == key):
+            # A fresh visit drops the forward history, like a browser; reloading the current entry keeps it
+            del self.nav_history[self.nav_index + 1:]
+            if not self.nav_history or self.nav_history[-1] != key:
+                self.nav_history.append(key)
+            self.nav_index = len(self.nav_history) - 1
+        self.current_df = entry["df"]
+        self.current_market = entry["market"]
+        self.current_ticker = entry["ticker"]
+        self.current_indicators = entry["indicators"]
+        self.ui.tabWidget.setCurrentWidget(self.ui.tabData)
+        self.populate_history_table(entry["df"], entry["model"])
+        self.plot_stock_data(entry["df"], entry["market"], entry["indicators"])
+        self.restart_live_mode()
+        self.show_quote_status(entry["market"], entry["ticker"], entry["df"])
+
+    def show_quote_status(self, market, ticker, df=None, refresh=True):
+        # Fill the status bar from the quote cache at once, refresh stale fields in the background
+        values, stale = self.quote_cache.get(market, ticker)
+        if "price" not in values and df is not None and not df.empty:
+            price_col = market_data.price_column(market)
+            price = df[price_col].iloc[-1]
+            change = df[price_col].iloc[-1] - df[price_col].iloc[-2] if len(df) > 1 else 0
+            values.update({"price": price, "change": change, "volume": df[market_data.volume_column(market)].iloc[-1]})
+        name = values.get("name", ticker)
+        message = f"{name} ({ticker}) - Market: {market}, Price: {values.get('price', 'N/A')}"
+        if "change" in values:
+            message += f", Change: {values['change']:.2f}"
+        message += f", Volume: {values.get('volume', 'N/A')}"
+        if values.get("sector"):
+            message += f", Sector: {values['sector']}"
+        self.ui.statusbar.showMessage(message)
+        if refresh and stale:
+            self.refresh_quotes([(market, ticker)])
+
+    def refresh_quotes(self, symbols):
+        if self.quote_worker is not None and self.quote_worker.isRunning():
+            # Picked up by on_quotes_refreshed once the running refresh is done
+            self.pending_quotes += [symbol for symbol in symbols if symbol not in self.pending_quotes]
+            return
+        # Ride along with the rest of the watchlist so one round trip refreshes everything
+        entries = self.watchlist.entries(self.current_watchlist_group())
+        symbols = symbols + [(market, ticker) for market, ticker, name in entries if (market, ticker) not in symbols]
+        # The watchlist store already has the names, so KRX rows never need a profile lookup
+        for market, ticker, name in entries:
+            self.quote_cache.put(market, ticker, {"name": name})
+        self.quote_worker = QuoteRefreshWorker(self.quote_cache, self.data_source, symbols)
+        self.quote_worker.finished.connect(self.on_quotes_refreshed)
+        self.quote_worker.start()
+
+    def on_quotes_refreshed(self, refreshed):
+        symbol = (self.current_market, self.current_ticker)
+        if symbol in refreshed and self.live_buffer is None:
+            self.show_quote_status(self.current_market, self.current_ticker, self.current_df, refresh=False)
+        pending, self.pending_quotes = self.pending_quotes, []
+        if pending:
+            # run() is returning right after the emit; let it finish so the next refresh is not queued again
+            self.quote_worker.wait()
+            self.refresh_quotes(pending)
+
+    def navigate_history(self, step):
+        index = self.nav_index + step
+        if index < 0 or index >= len(self.nav_history):
+            return
+        self.nav_index = index
+        key = self.nav_history[index]
+        entry = self.session_cache.get(key)
+        if entry is None:
+            # Evicted to stay under the memory cap; fetch it again
+            market, ticker, start, end = key
+            try:
+                df = self.data_source.get(market, ticker, start, end)
+            except Exception as e:
+                self.ui.statusbar.showMessage(f"Error fetching stock history for {ticker}: {e}")
+                return
+            if df.empty:
+                return
+            entry = self.build_session_entry(df, market, ticker)
+            self.session_cache.put(key, entry)
+        self.sync_controls(key)
+        self.show_session_entry(key, entry, record=False)
+
+    def plot_stock_data(self, df, market, indicators=None):
         price_col = '종가' if market in ["KOSPI", "KOSDAQ"] else 'Close'
-        volume_col = '거래량' if market in ["KOSPI", "KOSDAQ"] else 'Volume'
+        if indicators is None:
+            indicators = self.compute_indicators(df, market)
 
         # Plot price
         self.price_canvas.axes.cla()
-        self.price_canvas.axes.plot(df.index, df[price_col], label='Price')
+        self.price_lines = {}
+        self.indicator_artists = {}
+        self.price_bar_artists = []
+        self.price_bar_state = None
+        self.amount_canvas.axes.cla()
+        self.amount_canvas.axes.xaxis_date()
+        self.volume_artist = None
+        if self.combo_chart_style.currentText() == "Line":
+            self.price_lines['Price'], = self.price_canvas.axes.plot(df.index, df[price_col], label='Price')
         
-        # Calculate and plot moving averages
-        if len(df) >= 5:
-            ma5 = df[price_col].rolling(window=5).mean()
-            self.price_canvas.axes.plot(df.index, ma5, label='5-Day MA')
-        if len(df) >= 20:
-            ma20 = df[price_col].rolling(window=20).mean()
-            self.price_canvas.axes.plot(df.index, ma20, label='20-Day MA')
-        if len(df) >= 50:
-            ma50 = df[price_col].rolling(window=50).mean()
-            self.price_canvas.axes.plot(df.index, ma50, label='50-Day MA')
+        # Plot moving averages
+        for window, ma in indicators["ma"].items():
+            self.price_lines[window], = self.price_canvas.axes.plot(df.index, ma, label=f'{window}-Day MA')
 
         # Plot Bollinger Bands if checked
         show_bb = self.check_bb.isChecked()
         if show_bb:
-            upper, lower = self.calculate_bollinger_bands(df, price_col=price_col)
-            self.price_canvas.axes.plot(df.index, upper, label='Upper BB', linestyle='--', alpha=0.5)
-            self.price_canvas.axes.plot(df.index, lower, label='Lower BB', linestyle='--', alpha=0.5)
-            self.price_canvas.axes.fill_between(df.index, upper, lower, color='gray', alpha=0.1)
-            
+            upper, lower = indicators["bb"]
+            self.indicator_artists["bb_upper"], = self.price_canvas.axes.plot(df.index, upper, label='Upper BB', linestyle='--', alpha=0.5)
+            self.indicator_artists["bb_lower"], = self.price_canvas.axes.plot(df.index, lower, label='Lower BB', linestyle='--', alpha=0.5)
+            self.indicator_artists["bb_fill"] = self.price_canvas.axes.fill_between(df.index, upper, lower, color='gray', alpha=0.1)
+
+        # Candles and volume come from bars at a resolution picked for the canvas width, not one artist per day
+        self.draw_price_bars(df, market, redraw=False)
         self.price_canvas.axes.set_title("Price")
         self.price_canvas.axes.legend()
+        self.price_canvas.axes.callbacks.connect('xlim_changed', lambda axes: self.price_bar_timer.start())
         self.price_canvas.draw()
 
-        # Plot volume
-        self.amount_canvas.axes.cla()
-        self.amount_canvas.axes.bar(df.index, df[volume_col])
         self.amount_canvas.axes.set_title("Volume")
         self.amount_canvas.draw()
 
@@ -460,8 +996,9 @@ class MainWindow(QMainWindow):
             current_plot = 1
             if show_rsi:
                 ax_rsi = self.indicator_canvas.figure.add_subplot(num_plots, 1, current_plot)
-                rsi = self.calculate_rsi(df, price_col=price_col)
-                ax_rsi.plot(df.index, rsi, label='RSI')
+                rsi = indicators["rsi"]
+                self.indicator_artists["rsi"], = ax_rsi.plot(df.index, rsi, label='RSI')
+                self.indicator_artists["ax_rsi"] = ax_rsi
                 ax_rsi.axhline(70, color='red', linestyle='--')
                 ax_rsi.axhline(30, color='green', linestyle='--')
                 ax_rsi.set_title("RSI")
@@ -470,10 +1007,11 @@ class MainWindow(QMainWindow):
             
             if show_macd:
                 ax_macd = self.indicator_canvas.figure.add_subplot(num_plots, 1, current_plot)
-                macd, signal = self.calculate_macd(df, price_col=price_col)
-                ax_macd.plot(df.index, macd, label='MACD')
-                ax_macd.plot(df.index, signal, label='Signal')
-                ax_macd.bar(df.index, macd - signal, label='Hist', color='gray', alpha=0.3)
+                macd, signal = indicators["macd"]
+                self.indicator_artists["macd"], = ax_macd.plot(df.index, macd, label='MACD')
+                self.indicator_artists["signal"], = ax_macd.plot(df.index, signal, label='Signal')
+                self.indicator_artists["hist"] = self.draw_macd_histogram(ax_macd, df.index, macd - signal)
+                self.indicator_artists["ax_macd"] = ax_macd
                 ax_macd.set_title("MACD")
                 ax_macd.legend()
             
@@ -481,49 +1019,317 @@ class MainWindow(QMainWindow):
         else:
             self.indicator_canvas.setVisible(False)
 
-    def populate_history_table(self, df):
-        self.ui.tableWidgetHistory.clear()
-        
+    def restart_live_mode(self):
+        if self.live_worker is not None:
+            self.live_worker.stop()
+            self.live_worker = None
+        self.live_buffer = None
+        if not self.check_live.isChecked() or self.current_df is None or self.current_df.empty:
+            return
+
+        market = self.current_market
+        # Live bars go into a copy so the cached entry keeps the fetched history
+        model = self.history_model
+        self.populate_history_table(self.current_df, HistoryTableModel(model.headers, list(model.rows)))
+        self.live_buffer = market_data.BarBuffer.from_frame(self.current_df)
+        price_col = market_data.price_column(market)
+        for window in self.price_lines:
+            if window != 'Price':
+                self.live_buffer.add_derived(window, self.current_df[price_col].rolling(window=window).mean().to_numpy())
+        # Every indicator is seeded once, so ticks and indicator toggles only ever advance the tail
+        indicators = self.current_indicators
+        if indicators is None or len(indicators["rsi"]) != len(self.current_df):
+            indicators = self.compute_indicators(self.current_df, market)
+        closes = self.current_df[price_col]
+        seeds = {"bb_upper": indicators["bb"][0], "bb_lower": indicators["bb"][1], "rsi": indicators["rsi"],
+                 "ema_short": closes.ewm(span=12, adjust=False).mean(), "ema_long": closes.ewm(span=26, adjust=False).mean(),
+                 "macd": indicators["macd"][0], "signal": indicators["macd"][1]}
+        for name, series in seeds.items():
+            self.live_buffer.add_derived(name, series.to_numpy(dtype=float))
+
+        if self.check_simulated.isChecked():
+            feed = market_data.SimulatedQuoteFeed(market, self.current_df[price_col].iloc[-1])
+            interval_ms = 1000
+        else:
+            feed = market_data.MarketQuoteFeed(market, self.current_ticker)
+            interval_ms = 5000
+        self.live_worker = LiveWorker(feed, interval_ms)
+        self.live_worker.bar.connect(self.apply_live_bar)
+        self.live_worker.start()
+
+    def apply_live_bar(self, update):
+        buffer = self.live_buffer
+        if buffer is None:
+            return
+        timestamp, values = update
+        market = self.current_market
+        price_col = market_data.price_column(market)
+        volume_col = market_data.volume_column(market)
+        appended = buffer.apply(timestamp, values)
+        self.current_df = buffer.frame()
+
+        # Only the newest value of each indicator and the newest bar move; nothing is recomputed over the history
+        self.update_live_indicators(buffer, price_col)
+        n = buffer.size
+        dates = buffer.dates[:n]
+        derived = buffer.derived
+        if 'Price' in self.price_lines:
+            self.price_lines['Price'].set_data(dates, buffer.arrays[price_col][:n])
+        for window, line in self.price_lines.items():
+            if window != 'Price':
+                line.set_data(dates, derived[window][:n])
+        artists = self.indicator_artists
+        if "bb_upper" in artists:
+            artists["bb_upper"].set_data(dates, derived["bb_upper"][:n])
+            artists["bb_lower"].set_data(dates, derived["bb_lower"][:n])
+            artists["bb_fill"].remove()
+            artists["bb_fill"] = self.price_canvas.axes.fill_between(dates, derived["bb_upper"][:n], derived["bb_lower"][:n],
+                                                                     color='gray', alpha=0.1)
+        if self.combo_chart_style.currentText() == "Line":
+            self.price_canvas.axes.relim()
+            self.price_canvas.axes.autoscale_view()
+        self.update_last_price_bar(self.current_df, market)
+        self.price_canvas.draw_idle()
+        self.amount_canvas.draw_idle()
+
+        if "rsi" in artists:
+            artists["rsi"].set_data(dates, derived["rsi"][:n])
+        if "macd" in artists:
+            artists["macd"].set_data(dates, derived["macd"][:n])
+            artists["signal"].set_data(dates, derived["signal"][:n])
+            artists["hist"].set_data(*self.macd_histogram_path(dates, derived["macd"][:n] - derived["signal"][:n]))
+        for name in ("ax_rsi", "ax_macd"):
+            if name in artists:
+                artists[name].relim()
+                artists[name].autoscale_view()
+        if "ax_rsi" in artists or "ax_macd" in artists:
+            self.indicator_canvas.draw_idle()
+
+        self.update_history_table_row(self.current_df, appended)
+        self.ui.statusbar.showMessage(f"{self.current_ticker} - Market: {market}, Live Price: {buffer.arrays[price_col][buffer.size - 1]}, Volume: {buffer.arrays[volume_col][buffer.size - 1]}")
+
+    def update_live_indicators(self, buffer, price_col, bb_window=20, num_std=2):
+        n = buffer.size
+        close = float(buffer.arrays[price_col][n - 1])
+        for window in self.price_lines:
+            if window == 'Price':
+                continue
+            if window not in buffer.derived:
+                # A full redraw during live mode can add a moving average the buffer has not seen
+                buffer.add_derived(window, self.current_df[price_col].rolling(window=window).mean().to_numpy())
+            buffer.derived[window][n - 1] = buffer.rolling_tail(price_col, window)
+        ma = buffer.rolling_tail(price_col, bb_window)
+        std = buffer.rolling_std_tail(price_col, bb_window)
+        buffer.derived["bb_upper"][n - 1] = ma + num_std * std
+        buffer.derived["bb_lower"][n - 1] = ma - num_std * std
+        buffer.derived["rsi"][n - 1] = buffer.rsi_tail(price_col)
+        macd = buffer.ewm_tail("ema_short", close, 12) - buffer.ewm_tail("ema_long", close, 26)
+        buffer.derived["macd"][n - 1] = macd
+        buffer.ewm_tail("signal", macd, 9)
+
+    @staticmethod
+    def set_path(collection, i, vertices):
+        # Move one bar in place; set_verts/set_segments would rebuild a path for every bar
+        path = collection.get_paths()[i]
+        vertices = np.asarray(vertices, dtype=float)
+        if len(path.vertices) == len(vertices) + 1:
+            vertices = np.vstack([vertices, vertices[:1]])  # Closed polygons repeat the first vertex
+        path.vertices = vertices
+        collection.stale = True
+
+    def update_last_price_bar(self, df, market):
+        # Move only the newest candle and volume bar; a new bar, or a view that does not end on it, redraws the visible range
+        state = self.price_bar_state
+        if state is None or self.volume_artist is None:
+            self.draw_price_bars()
+            return
+        bar = market_data.last_period_bar(df, market, market_data.RESOLUTIONS[state["resolution"]])
+        x = mdates.date2num(bar.name)
+        if x != state["x_last"]:
+            self.draw_price_bars()
+            return
+
+        open_col, high_col, low_col, close_col, volume_col = market_data.ohlc_columns(market)
+        o, h, l, c, v = (float(bar[col]) for col in (open_col, high_col, low_col, close_col, volume_col))
+        half = state["half"]
+        color = to_rgba('tab:red' if c >= o else 'tab:blue')
+
+        self.set_path(self.volume_artist, -1, [[x - half, 0], [x - half, v], [x + half, v], [x + half, 0]])
+        volume_axes = self.amount_canvas.axes
+        if v * 1.05 > volume_axes.get_ylim()[1]:
+            volume_axes.set_ylim(0, v * 1.05)
+
+        if not self.price_bar_artists:
+            return
+        wick = [[x, l], [x, h]]
+        if len(self.price_bar_artists) == 2:
+            wick_lines, body_polys = self.price_bar_artists
+            self.set_path(wick_lines, -1, wick)
+            bottom, top = min(o, c), max(o, c)
+            self.set_path(body_polys, -1, [[x - half, bottom], [x - half, top], [x + half, top], [x + half, bottom]])
+            colors = wick_lines.get_color().copy()
+            colors[-1] = color
+            wick_lines.set_color(colors)
+            body_polys.set_facecolor(colors)
+            body_polys.set_edgecolor(colors)
+        else:
+            lines = self.price_bar_artists[0]
+            count = len(lines.get_paths()) // 3
+            self.set_path(lines, count - 1, wick)
+            self.set_path(lines, 2 * count - 1, [[x - half, o], [x, o]])
+            self.set_path(lines, 3 * count - 1, [[x, c], [x + half, c]])
+            colors = lines.get_color().copy()
+            for i in (count - 1, 2 * count - 1, 3 * count - 1):
+                colors[i] = color
+            lines.set_color(colors)
+        price_axes = self.price_canvas.axes
+        bottom, top = price_axes.get_ylim()
+        if l * 0.98 < bottom or h * 1.02 > top:
+            price_axes.set_ylim(min(bottom, l * 0.98), max(top, h * 1.02))
+
+    def update_history_table_row(self, df, appended):
+        row = len(df) - 1
+        self.history_model.set_row(row, [str(df.index[row].strftime("%Y-%m-%d"))] + [str(df[col].iloc[row]) for col in df.columns])
+
+    def zoom_price_chart(self, event):
+        if event.xdata is None or self.current_df is None:
+            return
+        axes = self.price_canvas.axes
+        factor = 0.8 if event.button == 'up' else 1.25
+        left, right = axes.get_xlim()
+        axes.set_xlim(event.xdata - (event.xdata - left) * factor, event.xdata + (right - event.xdata) * factor)
+        self.price_canvas.draw_idle()
+
+    def price_bars_for_range(self, df, market, start, end):
+        # Resolution follows how many daily bars are visible, so cost is bounded by the canvas width
+        visible = df.loc[start:end]
+        resolution = market_data.choose_resolution(len(visible), self.price_canvas.width())
+        rule = market_data.RESOLUTIONS[resolution]
+        if rule is None:
+            return visible, resolution
+        bars = None
+        if self.live_buffer is None and self.current_ticker is not None:
+            bars = self.data_source.get_resampled(market, self.current_ticker, rule, start, end)
+        if bars is None:
+            bars = market_data.resample_ohlcv(visible, market, rule)
+        return bars, resolution
+
+    def macd_histogram_path(self, dates, hist):
+        # Every bar is a vertical stroke of one NaN-separated line, reduced to the canvas width with min/max buckets
+        x = mdates.date2num(np.asarray(dates, dtype="datetime64[ns]"))
+        xs, ys = market_data.downsample_minmax(x, np.asarray(hist, dtype=float), max(self.indicator_canvas.width(), 200))
+        return np.repeat(xs, 3), np.column_stack([np.zeros_like(ys), ys, np.full_like(ys, np.nan)]).ravel()
+
+    def draw_macd_histogram(self, axes, index, hist):
+        return axes.plot(*self.macd_histogram_path(index, hist), color='gray', alpha=0.3, label='Hist')[0]
+
+    def draw_volume_bars(self, bars, market, x, half):
+        axes = self.amount_canvas.axes
+        if self.volume_artist is not None and self.volume_artist in axes.collections:
+            self.volume_artist.remove()
+        volumes = bars[market_data.volume_column(market)].to_numpy(dtype=float)
+        zeros = np.zeros_like(volumes)
+        columns = np.stack([np.column_stack([x - half, zeros]), np.column_stack([x - half, volumes]),
+                            np.column_stack([x + half, volumes]), np.column_stack([x + half, zeros])], axis=1)
+        self.volume_artist = axes.add_collection(PolyCollection(columns, facecolors='tab:blue', edgecolors='none'))
+        axes.set_ylim(0, max(np.nanmax(volumes), 1) * 1.05)
+
+    def draw_price_bars(self, df=None, market=None, redraw=True):
+        df = self.current_df if df is None else df
+        market = self.current_market if market is None else market
+        if df is None or df.empty:
+            return
+        style = self.combo_chart_style.currentText()
+        axes = self.price_canvas.axes
+        for artist in self.price_bar_artists:
+            artist.remove()
+        self.price_bar_artists = []
+        self.price_bar_state = None
+
+        if redraw:
+            left, right = (mdates.num2date(x).replace(tzinfo=None) for x in axes.get_xlim())
+            start, end = pd.Timestamp(left), pd.Timestamp(right)
+        else:
+            start, end = df.index[0], df.index[-1]
+        bars, resolution = self.price_bars_for_range(df, market, start, end)
+        if bars.empty:
+            return
+
+        open_col, high_col, low_col, close_col, volume_col = market_data.ohlc_columns(market)
+        x = mdates.date2num(bars.index.to_pydatetime())
+        opens = bars[open_col].to_numpy(dtype=float)
+        highs = bars[high_col].to_numpy(dtype=float)
+        lows = bars[low_col].to_numpy(dtype=float)
+        closes = bars[close_col].to_numpy(dtype=float)
+        half = 0.35 * {"D": 1, "W": 7, "M": 30}[resolution]
+        colors = np.where(closes >= opens, 'tab:red', 'tab:blue')
+        self.draw_volume_bars(bars, market, x, half)
+        self.price_bar_state = {"resolution": resolution, "x_last": x[-1], "half": half}
+        if style == "Line":
+            self.amount_canvas.axes.set_xlim(axes.get_xlim())
+            if redraw:
+                self.amount_canvas.draw_idle()
+            return
+
+        wicks = np.stack([np.column_stack([x, lows]), np.column_stack([x, highs])], axis=1)
+        if style == "Candlestick":
+            wick_lines = LineCollection(wicks, colors=colors, linewidths=0.8)
+            bottoms = np.minimum(opens, closes)
+            tops = np.maximum(opens, closes)
+            bodies = np.stack([np.column_stack([x - half, bottoms]), np.column_stack([x - half, tops]),
+                               np.column_stack([x + half, tops]), np.column_stack([x + half, bottoms])], axis=1)
+            body_polys = PolyCollection(bodies, facecolors=colors, edgecolors=colors, linewidths=0.5)
+            self.price_bar_artists = [axes.add_collection(wick_lines), axes.add_collection(body_polys)]
+        else:
+            open_ticks = np.stack([np.column_stack([x - half, opens]), np.column_stack([x, opens])], axis=1)
+            close_ticks = np.stack([np.column_stack([x, closes]), np.column_stack([x + half, closes])], axis=1)
+            segments = np.concatenate([wicks, open_ticks, close_ticks])
+            self.price_bar_artists = [axes.add_collection(LineCollection(segments, colors=np.tile(colors, 3), linewidths=0.8))]
+
+        if not redraw:
+            axes.set_xlim(x[0] - half, x[-1] + half)
+        axes.set_ylim(lows.min() * 0.98, highs.max() * 1.02)
+        self.amount_canvas.axes.set_xlim(axes.get_xlim())
+        if redraw:
+            self.price_canvas.draw_idle()
+            self.amount_canvas.draw_idle()
+
+    def format_history_rows(self, df):
         # Add 'Date' as the first column header
         headers = ["Date"] + list(df.columns)
-        self.ui.tableWidgetHistory.setColumnCount(len(headers))
-        self.ui.tableWidgetHistory.setHorizontalHeaderLabels(headers)
-        self.ui.tableWidgetHistory.setRowCount(len(df))
+        rows = []
+        for index, row in df.iterrows():
+            rows.append([str(index.strftime("%Y-%m-%d"))] + [str(row[col]) for col in df.columns])
+        return headers, rows
+
+    def populate_history_table(self, df, model=None):
+        if model is None:
+            model = HistoryTableModel(*self.format_history_rows(df))
+        # The window holds the model it shows, so evicting the session entry cannot delete it from under the view
+        self.history_model = model
+        self.history_view.setModel(model)
 
-        for i, (index, row) in enumerate(df.iterrows()):
-            # Set the date in the first column
-            self.ui.tableWidgetHistory.setItem(i, 0, QTableWidgetItem(str(index.strftime("%Y-%m-%d"))))
-            # Set the rest of the data in subsequent columns
-            for j, col in enumerate(df.columns):
-                self.ui.tableWidgetHistory.setItem(i, j + 1, QTableWidgetItem(str(row[col])))
+    def clear_history_table(self):
+        self.populate_history_table(None, HistoryTableModel())
 
     def update_stock_list(self):
         self.ui.statusbar.clearMessage()
         selected_market = self.ui.comboBoxMarket.currentText()
         self.ui.listWidgetStocks.clear()
 
-        if selected_market in ["KOSPI", "KOSDAQ"]:
-            today = datetime.datetime.now().strftime("%Y%m%d")
-            tickers = stock.get_market_ticker_list(today, market=selected_market)
-            for ticker in tickers:
-                name = stock.get_market_ticker_name(ticker)
-                self.ui.listWidgetStocks.addItem(f"{name} ({ticker})")
-        elif selected_market == "NYSE":
-            try:
-                df = pd.read_csv("nyse-listed.csv").dropna(subset=["ACT Symbol", "Company Name"])
-                df = df[df["ACT Symbol"].str.match(r'^[A-Z]+$')]
-                for index, row in df.iterrows():
-                    self.ui.listWidgetStocks.addItem(f"{row['Company Name']} ({row['ACT Symbol']})")
-            except FileNotFoundError:
-                self.ui.listWidgetStocks.addItem("nyse-listed.csv not found.")
-        elif selected_market == "NASDAQ":
-            try:
-                df = pd.read_csv("nasdaq-listed.csv").dropna(subset=["Symbol", "Security Name"])
-                df = df[df["Symbol"].str.match(r'^[A-Z]+$')]
-                for index, row in df.iterrows():
-                    self.ui.listWidgetStocks.addItem(f"{row['Security Name']} ({row['Symbol']})")
-            except FileNotFoundError:
-                self.ui.listWidgetStocks.addItem("nasdaq-listed.csv not found.")
+        try:
+            symbols = self.data_source.symbols(selected_market)
+        except FileNotFoundError:
+            csv_file = market_data.listing_csv(selected_market)[0]
+            self.ui.listWidgetStocks.addItem(f"{csv_file} not found.")
+            return
+        except Exception as e:
+            self.ui.statusbar.showMessage(f"Error loading {selected_market} symbols: {e}")
+            return
+        for name, ticker in symbols:
+            item = QListWidgetItem(f"{name} ({ticker})")
+            item.setData(Qt.UserRole, (selected_market, ticker))
+            self.ui.listWidgetStocks.addItem(item)
 
 
 def main():
@@ -536,6 +1342,11 @@ def main():
         if hasattr(window, 'worker') and window.worker.isRunning():
             window.worker.terminate()
             window.worker.wait() # Wait for the thread to finish
+        window.alert_timer.stop()
+        if window.live_worker is not None:
+            window.live_worker.stop()
+        if window.alert_worker is not None and window.alert_worker.isRunning():
+            window.alert_worker.wait()
     
     app.aboutToQuit.connect(cleanup)
 
@@ -0,0 +1,952 @@
+import os
+import io
+import json
+import threading
+import time
+import datetime
+import urllib.parse
+import urllib.request
+from zoneinfo import ZoneInfo
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from pykrx import stock
+
+KRX_MARKETS = ["KOSPI", "KOSDAQ"]
+US_MARKETS = ["NYSE", "NASDAQ"]
+# Exchange timezone and the local time after which the day's bar is final (the close plus a margin for closing prints)
+MARKET_SESSIONS = {"KRX": (ZoneInfo("Asia/Seoul"), datetime.time(16, 0)),
+                   "US": (ZoneInfo("America/New_York"), datetime.time(16, 30))}
+
+
+def price_column(market):
+    return '종가' if market in KRX_MARKETS else 'Close'
+
+
+def volume_column(market):
+    return '거래량' if market in KRX_MARKETS else 'Volume'
+
+
+def market_for_symbol(ticker):
+    # KRX tickers are six digit codes, everything else goes to Yahoo
+    return "KOSPI" if ticker.isdigit() else "NYSE"
+
+
+def listing_market_resolver():
+    # Resolves many tickers against the listings, each fetched or read once on first use:
+    # one KOSPI and one KOSDAQ request for KRX codes, the shipped NYSE and NASDAQ files for the rest
+    listings = {}
+
+    def load(markets):
+        for market in markets:
+            if market in KRX_MARKETS:
+                listings[market] = set(stock.get_market_ticker_list(market=market))
+            else:
+                try:
+                    listings[market] = {ticker for name, ticker in list_symbols(market)}
+                except FileNotFoundError:
+                    listings[market] = set()
+
+    def resolve(ticker):
+        markets = KRX_MARKETS if ticker.isdigit() else US_MARKETS
+        if markets[0] not in listings:
+            load(markets)
+        for market in markets:
+            if ticker in listings[market]:
+                return market
+        return market_for_symbol(ticker)
+
+    return resolve
+
+
+def to_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def last_finished_session(market, now=None):
+    # Latest exchange-local date whose session is over; weekends and holidays simply have no bar
+    zone, settled = MARKET_SESSIONS[provider_for_market(market)]
+    now = datetime.datetime.now(zone) if now is None else now.astimezone(zone)
+    if now.time() >= settled:
+        return now.date()
+    return now.date() - datetime.timedelta(days=1)
+
+
+def fetch_history(market, ticker, start, end):
+    # start and end are inclusive dates
+    start, end = to_date(start), to_date(end)
+    if market in KRX_MARKETS:
+        df = stock.get_market_ohlcv(start.strftime("%Y%m%d"), end.strftime("%Y%m%d"), ticker)
+    else:
+        df = yf.Ticker(ticker).history(start=start.strftime("%Y-%m-%d"),
+                                       end=(end + datetime.timedelta(days=1)).strftime("%Y-%m-%d"))
+        # Yahoo returns exchange-local timestamps; daily bars only need the date
+        if not df.empty and df.index.tz is not None:
+            df.index = df.index.tz_localize(None).normalize()
+    return df
+
+
+class HistoryCache:
+    # Per-ticker daily history, least recently used tickers evicted by total bytes
+    def __init__(self, fetcher=fetch_history, max_workers=8, max_bytes=256 * 1024 * 1024):
+        self.fetcher = fetcher
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _resize(self, key, entry):
+        # Called under the lock whenever an entry's frames change; always keeps the entry just touched
+        nbytes = int(entry["df"].memory_usage(deep=True).sum())
+        nbytes += sum(int(df.memory_usage(deep=True).sum()) for df in entry["aggregates"].values())
+        self.total_bytes += nbytes - entry.get("nbytes", 0)
+        entry["nbytes"] = nbytes
+        self._entries.move_to_end(key)
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= evicted["nbytes"]
+
+    def _key(self, market, ticker):
+        # KOSPI and KOSDAQ share one KRX history, NYSE and NASDAQ one Yahoo history
+        return ("KRX" if market in KRX_MARKETS else "US", ticker)
+
+    def missing_ranges(self, market, ticker, start, end):
+        start, end = to_date(start), to_date(end)
+        with self._lock:
+            entry = self._entries.get(self._key(market, ticker))
+        if entry is None:
+            return [(start, end)]
+        # Fetch up to the cached span even when the request does not touch it, so the span never has holes
+        ranges = []
+        if start < entry["start"]:
+            ranges.append((start, entry["start"] - datetime.timedelta(days=1)))
+        if end > entry["end"]:
+            ranges.append((entry["end"] + datetime.timedelta(days=1), end))
+        return ranges
+
+    def _store(self, market, ticker, start, end, df):
+        # A session that has not closed yet is still moving, so never mark it as covered
+        covered_end = min(end, last_finished_session(market))
+        key = self._key(market, ticker)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"df": df.sort_index(), "start": start, "end": max(covered_end, start - datetime.timedelta(days=1)),
+                         "aggregates": {}}
+                self._entries[key] = entry
+                self._resize(key, entry)
+                return entry["df"]
+            # Weekly and monthly bars are derived from the daily ones, rebuild them lazily
+            entry["aggregates"] = {}
+            if entry["df"].empty:
+                entry["df"] = df.sort_index()
+            elif not df.empty:
+                merged = pd.concat([entry["df"], df])
+                entry["df"] = merged[~merged.index.duplicated(keep="last")].sort_index()
+            entry["start"] = min(entry["start"], start)
+            entry["end"] = max(entry["end"], covered_end)
+            self._resize(key, entry)
+            return entry["df"]
+
+    def get(self, market, ticker, start, end):
+        start, end = to_date(start), to_date(end)
+        df = None
+        for range_start, range_end in self.missing_ranges(market, ticker, start, end):
+            fetched = self.fetcher(market, ticker, range_start, range_end)
+            df = self._store(market, ticker, range_start, range_end, fetched)
+        key = self._key(market, ticker)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                df = entry["df"]
+        if df is None:
+            # Another thread evicted the ticker between the range check and the read
+            return self.get(market, ticker, start, end)
+        if df.empty:
+            return df
+        return df.loc[pd.Timestamp(start):pd.Timestamp(end)]
+
+    def get_resampled(self, market, ticker, rule, start, end):
+        # Aggregates are built once per cached history and sliced per request
+        key = self._key(market, ticker)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            aggregated = entry["aggregates"].get(rule)
+            df = entry["df"]
+        if aggregated is None:
+            aggregated = resample_ohlcv(df, market, rule)
+            with self._lock:
+                if self._entries.get(key) is entry and entry["df"] is df:
+                    entry["aggregates"][rule] = aggregated
+                    self._resize(key, entry)
+        if aggregated.empty:
+            return aggregated
+        return aggregated.loc[pd.Timestamp(start):pd.Timestamp(end)]
+
+    def get_many(self, symbols, start, end):
+        # symbols is a list of (market, ticker); failures come back as None
+        def load(symbol):
+            try:
+                return self.get(symbol[0], symbol[1], start, end)
+            except Exception as e:
+                print(f"Error fetching {symbol[1]}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            frames = list(executor.map(load, symbols))
+        return dict(zip(symbols, frames))
+
+
+history_cache = HistoryCache()
+
+
+class RateLimiter:
+    # Spaces out calls to one provider across every thread that shares it
+    def __init__(self, calls_per_second):
+        self.interval = 1.0 / calls_per_second
+        self.next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+provider_limiters = {"KRX": RateLimiter(5), "US": RateLimiter(10)}
+
+
+def provider_for_market(market):
+    return "KRX" if market in KRX_MARKETS else "US"
+
+
+def listing_csv(market):
+    if market == "NYSE":
+        return "nyse-listed.csv", "ACT Symbol", "Company Name"
+    return "nasdaq-listed.csv", "Symbol", "Security Name"
+
+
+def period_start(period, today):
+    if period == "1 Week":
+        return today - datetime.timedelta(weeks=1)
+    if period == "1 Month":
+        return today - datetime.timedelta(days=30)
+    return today - datetime.timedelta(days=1)
+
+
+def scan_fetch(market, ticker, start, end):
+    # One provider request, spaced by the provider's shared limiter
+    provider_limiters[provider_for_market(market)].wait()
+    return fetch_history(market, ticker, start, end)
+
+
+def scan_symbols(market):
+    # (name, ticker) in listing order; a KRX name is one more request, so it is only looked up for results
+    if market in KRX_MARKETS:
+        provider_limiters["KRX"].wait()
+        today = datetime.datetime.now().strftime("%Y%m%d")
+        return [(None, ticker) for ticker in stock.get_market_ticker_list(today, market=market)]
+    return list_symbols(market)
+
+
+def scan_market(market, period, limit=20, fetch=scan_fetch, lister=scan_symbols, today=None):
+    # Returns (name, ticker, % change, market) for up to limit tickers of one market
+    today = today or datetime.datetime.now()
+    start_date = period_start(period, today)
+    price_col = price_column(market)
+    try:
+        symbols = lister(market)
+    except FileNotFoundError:
+        print(f"{listing_csv(market)[0]} not found.")
+        return []
+    if market in KRX_MARKETS:
+        candidates = symbols[:limit] # Limiting for performance
+    else:
+        # Random tickers across the listing until enough of them have data
+        candidates = [symbols[i] for i in np.random.permutation(len(symbols))]
+
+    results = []
+    for name, ticker in candidates:
+        try:
+            df = fetch(market, ticker, start_date, today)
+        except Exception as e:
+            print(f"Error fetching {ticker}: {e}")
+            continue
+        if df.empty or price_col not in df.columns or df[price_col].isnull().all():
+            print(f"No data for {ticker}, possibly delisted.")
+            continue
+        if len(df) < 2:
+            print(f"Not enough data for {ticker} to calculate change.")
+            continue
+        price_change = (df[price_col].iloc[-1] - df[price_col].iloc[0]) / df[price_col].iloc[0] * 100
+        if name is None:
+            name = stock.get_market_ticker_name(ticker)
+        results.append((name, ticker, price_change, market))
+        if len(results) >= limit:
+            break
+
+    results.sort(key=lambda x: x[2])
+    return results
+
+
+def scan_markets(markets, period, limit=20, fetch=scan_fetch, lister=scan_symbols, today=None):
+    # Markets run side by side; each provider's limiter keeps its own pace
+    with ThreadPoolExecutor(max_workers=len(markets)) as executor:
+        scans = list(executor.map(lambda market: scan_market(market, period, limit, fetch, lister, today), markets))
+    merged = [result for results in scans for result in results]
+    merged.sort(key=lambda x: x[2])
+    return merged
+
+
+def rebase_closes(frames, base=100.0):
+    # frames maps a label to (market, df); returns one frame on the union of trading dates,
+    # starting at the first date every series has a close so all of them are 100 on the same day
+    closes = {}
+    for label, (market, df) in frames.items():
+        if df is None or df.empty:
+            continue
+        closes[label] = df[price_column(market)].astype(float)
+    if not closes:
+        return pd.DataFrame()
+    combined = pd.concat(closes, axis=1).sort_index()
+    # Markets close on different holidays, carry the last close across the gaps but not past a series' last bar
+    combined = combined.ffill(limit_area="inside")
+    common = combined.dropna()
+    if common.empty:
+        return pd.DataFrame()
+    combined = combined.loc[common.index[0]:]
+    return combined / combined.iloc[0] * base
+
+
+def downsample_minmax(x, y, max_points):
+    # Keep the min and max of every bucket so peaks survive the reduction
+    n = len(x)
+    if n <= max_points or max_points < 4:
+        return x, y
+    buckets = max_points // 2
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    keep = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        chunk = y[lo:hi]
+        if np.isnan(chunk).all():
+            continue
+        i_min = lo + int(np.nanargmin(chunk))
+        i_max = lo + int(np.nanargmax(chunk))
+        keep.extend(sorted({i_min, i_max}))
+    keep = np.asarray(keep, dtype=int)
+    return x[keep], y[keep]
+
+
+def list_symbols(market):
+    # Returns (name, ticker) pairs in listing order
+    if market in KRX_MARKETS:
+        today = datetime.datetime.now().strftime("%Y%m%d")
+        return [(stock.get_market_ticker_name(ticker), ticker) for ticker in stock.get_market_ticker_list(today, market=market)]
+    csv_file, symbol_col, name_col = listing_csv(market)
+    df = pd.read_csv(csv_file).dropna(subset=[symbol_col, name_col])
+    df = df[df[symbol_col].str.match(r'^[A-Z]+$')]
+    return list(zip(df[name_col], df[symbol_col]))
+
+
+def fetch_quote(market, ticker, cache=None):
+    cache = cache or history_cache
+    today = datetime.date.today()
+    df = cache.get(market, ticker, today - datetime.timedelta(days=10), today)
+    if df.empty:
+        return None
+    price_col = price_column(market)
+    price = float(df[price_col].iloc[-1])
+    previous = float(df[price_col].iloc[-2]) if len(df) > 1 else price
+    return {"price": price, "change": price - previous, "change_pct": (price - previous) / previous * 100 if previous else 0.0,
+            "volume": float(df[volume_column(market)].iloc[-1]), "date": df.index[-1].strftime("%Y-%m-%d")}
+
+
+def snapshot_quotes(symbols):
+    # One request per provider for the whole list: KRX by date for every ticker, Yahoo as a batch download
+    snapshot = {}
+    krx = [ticker for market, ticker in symbols if market in KRX_MARKETS]
+    us = [ticker for market, ticker in symbols if market not in KRX_MARKETS]
+    if krx:
+        provider_limiters["KRX"].wait()
+        date = stock.get_nearest_business_day_in_a_week()
+        df = stock.get_market_ohlcv(date, market="ALL")
+        for market, ticker in symbols:
+            if market in KRX_MARKETS and ticker in df.index:
+                row = df.loc[ticker]
+                price = float(row['종가'])
+                change_pct = float(row['등락률'])
+                snapshot[(market, ticker)] = {"price": price, "change": price - price / (1 + change_pct / 100),
+                                              "change_pct": change_pct, "volume": float(row['거래량'])}
+    if us:
+        provider_limiters["US"].wait()
+        df = yf.download(us, period="5d", group_by="ticker", progress=False, threads=True)
+        for market, ticker in symbols:
+            if market in KRX_MARKETS:
+                continue
+            try:
+                bars = df[ticker] if isinstance(df.columns, pd.MultiIndex) else df
+            except KeyError:
+                continue
+            bars = bars.dropna(subset=['Close'])
+            if bars.empty:
+                continue
+            price = float(bars['Close'].iloc[-1])
+            previous = float(bars['Close'].iloc[-2]) if len(bars) > 1 else price
+            snapshot[(market, ticker)] = {"price": price, "change": price - previous,
+                                          "change_pct": (price - previous) / previous * 100 if previous else 0.0,
+                                          "volume": float(bars['Volume'].iloc[-1])}
+    return snapshot
+
+
+def fetch_profiles(symbols, max_workers=8):
+    # Slow-moving fields: names come from the KRX ticker table, Yahoo needs one info call per ticker
+    def load(symbol):
+        market, ticker = symbol
+        try:
+            if market in KRX_MARKETS:
+                return symbol, {"name": stock.get_market_ticker_name(ticker)}
+            provider_limiters["US"].wait()
+            info = yf.Ticker(ticker).info
+            return symbol, {"name": info.get('shortName', ticker), "sector": info.get('sector')}
+        except Exception as e:
+            print(f"Error fetching profile for {ticker}: {e}")
+            return symbol, {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(executor.map(load, symbols))
+
+
+QUOTE_FIELD_TTLS = {"price": 60, "change": 60, "change_pct": 60, "volume": 60, "name": 24 * 3600, "sector": 24 * 3600}
+PRICE_FIELDS = ("price", "change", "change_pct", "volume")
+PROFILE_FIELDS = ("name", "sector")
+
+
+class QuoteCache:
+    # Per-field TTLs: prices go stale in a minute, names and sectors last a day
+    def __init__(self, ttls=QUOTE_FIELD_TTLS):
+        self.ttls = ttls
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def put(self, market, ticker, values, fetched_at=None):
+        # None is cached too: an ETF has no sector, and that answer lasts as long as a real one
+        fetched_at = time.monotonic() if fetched_at is None else fetched_at
+        with self._lock:
+            entry = self._entries.setdefault((market, ticker), {})
+            for field, value in values.items():
+                entry[field] = (value, fetched_at)
+
+    def get(self, market, ticker):
+        # Returns every cached value, fresh or not, and the set of fields that need a refresh
+        now = time.monotonic()
+        with self._lock:
+            entry = dict(self._entries.get((market, ticker), {}))
+        values = {field: value for field, (value, fetched_at) in entry.items() if value is not None}
+        stale = {field for field in self.ttls
+                 if field not in entry or now - entry[field][1] > self.ttls[field]}
+        return values, stale
+
+    def refresh(self, symbols, source):
+        # One snapshot for every symbol with stale prices, one threaded profile pass for stale names and sectors
+        price_symbols, profile_symbols = [], []
+        for market, ticker in symbols:
+            values, stale = self.get(market, ticker)
+            if stale & set(PRICE_FIELDS):
+                price_symbols.append((market, ticker))
+            # KRX has no sector, so a known name is enough there
+            needed = {"name"} if market in KRX_MARKETS else set(PROFILE_FIELDS)
+            if stale & needed:
+                profile_symbols.append((market, ticker))
+        if price_symbols:
+            for symbol, quote in source.snapshot(price_symbols).items():
+                self.put(symbol[0], symbol[1], quote)
+        if profile_symbols:
+            for symbol, profile in source.profiles(profile_symbols).items():
+                self.put(symbol[0], symbol[1], profile)
+        return price_symbols + [symbol for symbol in profile_symbols if symbol not in price_symbols]
+
+
+def fetch_market_snapshots(market, start, end, chunk_size=200):
+    # Whole-market daily closes and volumes as {date: DataFrame(close, volume) indexed by ticker}
+    start, end = to_date(start), to_date(end)
+    snapshots = {}
+    if market in KRX_MARKETS:
+        # KRX answers one date for every ticker in a single call
+        for day in pd.bdate_range(start, end):
+            provider_limiters["KRX"].wait()
+            df = stock.get_market_ohlcv(day.strftime("%Y%m%d"), market=market)
+            df = df[df['종가'] > 0] if not df.empty else df
+            if df.empty:
+                continue  # Holiday
+            snapshots[day.date()] = pd.DataFrame({"close": df['종가'].astype(float), "volume": df['거래량'].astype(float)})
+        return snapshots
+
+    # Yahoo answers many tickers over a range, so download the range in ticker chunks and split it by day
+    tickers = [ticker for name, ticker in list_symbols(market)]
+    closes, volumes = [], []
+    for i in range(0, len(tickers), chunk_size):
+        chunk = tickers[i:i + chunk_size]
+        provider_limiters["US"].wait()
+        df = yf.download(chunk, start=start.strftime("%Y-%m-%d"), end=(end + datetime.timedelta(days=1)).strftime("%Y-%m-%d"),
+                         group_by="column", progress=False, threads=True)
+        if df.empty:
+            continue
+        close, volume = df['Close'], df['Volume']
+        if isinstance(close, pd.Series):
+            close, volume = close.to_frame(chunk[0]), volume.to_frame(chunk[0])
+        closes.append(close)
+        volumes.append(volume)
+    if not closes:
+        return snapshots
+    close_panel = pd.concat(closes, axis=1)
+    volume_panel = pd.concat(volumes, axis=1)
+    if close_panel.index.tz is not None:
+        close_panel.index = close_panel.index.tz_localize(None)
+        volume_panel.index = volume_panel.index.tz_localize(None)
+    for day in close_panel.index:
+        snapshot = pd.DataFrame({"close": close_panel.loc[day], "volume": volume_panel.loc[day]}).dropna(subset=["close"])
+        if not snapshot.empty:
+            snapshots[day.date()] = snapshot
+    return snapshots
+
+
+BREADTH_YEAR = 252
+
+
+def breadth_metrics(closes, volumes):
+    # One row of breadth for the last date of a (dates x tickers) close window; vectorized across tickers.
+    # Anything the window is too short for comes back as NaN rather than a misleading zero
+    today, yesterday = closes.iloc[-1], closes.iloc[-2] if len(closes) > 1 else None
+    row = {}
+    if yesterday is not None:
+        both = today.notna() & yesterday.notna()
+        row["advancers"] = int((today[both] > yesterday[both]).sum())
+        row["decliners"] = int((today[both] < yesterday[both]).sum())
+        row["unchanged"] = int(both.sum()) - row["advancers"] - row["decliners"]
+        up_volume = volumes.iloc[-1][both & (today > yesterday)].sum()
+    else:
+        row["advancers"] = row["decliners"] = row["unchanged"] = float("nan")
+        up_volume = float("nan")
+    if len(closes) >= BREADTH_YEAR:
+        year = closes.iloc[-BREADTH_YEAR:]
+        row["new_highs"] = int((today >= year.max()).where(year.count() >= 200, False).sum())
+        row["new_lows"] = int((today <= year.min()).where(year.count() >= 200, False).sum())
+    else:
+        row["new_highs"] = row["new_lows"] = float("nan")
+    for window in (20, 50):
+        recent = closes.iloc[-window:]
+        valid = recent.count() == window
+        above = (today > recent.mean())[valid]
+        row[f"pct_above_ma{window}"] = float(above.mean() * 100) if len(above) else float("nan")
+    volume = volumes.iloc[-1].dropna()
+    row["total_volume"] = float(volume.sum())
+    row["median_volume"] = float(volume.median()) if len(volume) else float("nan")
+    row["p90_volume"] = float(volume.quantile(0.9)) if len(volume) else float("nan")
+    row["up_volume_pct"] = float(up_volume / volume.sum() * 100) if volume.sum() else float("nan")
+    return row
+
+
+class BreadthStore:
+    # Daily whole-market snapshots on disk; a new day adds one snapshot and one metrics row.
+    # The default lookback is a year of highs and lows plus the 120 days the dashboard shows
+    def __init__(self, market, root="breadth_cache", fetcher=fetch_market_snapshots, lookback_sessions=BREADTH_YEAR + 120):
+        self.market = market
+        self.directory = os.path.join(root, market)
+        self.fetcher = fetcher
+        self.lookback_sessions = lookback_sessions
+        self.closes = pd.DataFrame()
+        self.volumes = pd.DataFrame()
+        self.metrics = pd.DataFrame()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.isdir(self.directory):
+            return
+        snapshots = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith(".csv") and filename != "metrics.csv":
+                day = datetime.date.fromisoformat(filename[:-4])
+                snapshots[day] = pd.read_csv(os.path.join(self.directory, filename), index_col="ticker", dtype={"ticker": str})
+        self._append(snapshots)
+        metrics_path = os.path.join(self.directory, "metrics.csv")
+        if os.path.exists(metrics_path):
+            metrics = pd.read_csv(metrics_path, index_col=0, parse_dates=True)
+            # Drop rows saved before a full year of snapshots was available, they are recomputed below
+            self.metrics = metrics[metrics.index >= self.first_complete_day()] if len(self.closes) >= BREADTH_YEAR else metrics.iloc[:0]
+
+    def first_complete_day(self):
+        return self.closes.index[BREADTH_YEAR - 1]
+
+    def _append(self, snapshots):
+        if not snapshots:
+            return
+        days = sorted(snapshots)
+        index = pd.DatetimeIndex([pd.Timestamp(day) for day in days])
+        closes = pd.DataFrame([snapshots[day]["close"] for day in days], index=index)
+        volumes = pd.DataFrame([snapshots[day]["volume"] for day in days], index=index)
+        self.closes = pd.concat([self.closes, closes]).sort_index()
+        self.volumes = pd.concat([self.volumes, volumes]).sort_index()
+        self.closes = self.closes[~self.closes.index.duplicated(keep="last")]
+        self.volumes = self.volumes[~self.volumes.index.duplicated(keep="last")]
+
+    def _save(self, snapshots):
+        os.makedirs(self.directory, exist_ok=True)
+        for day, snapshot in snapshots.items():
+            snapshot.to_csv(os.path.join(self.directory, f"{day.isoformat()}.csv"), index_label="ticker")
+        self.metrics.to_csv(os.path.join(self.directory, "metrics.csv"))
+
+    def update(self, end=None):
+        # Only finished sessions are stored, judged in the exchange's own timezone; a session still trading is refetched later
+        last_finished = last_finished_session(self.market)
+        end = min(to_date(end), last_finished) if end else last_finished
+        with self._lock:
+            if self.closes.empty:
+                # Extra business days cover the exchange holidays in the lookback
+                start = (pd.Timestamp(end) - pd.offsets.BDay(self.lookback_sessions + 25)).date()
+            else:
+                start = self.closes.index[-1].date() + datetime.timedelta(days=1)
+            snapshots = self.fetcher(self.market, start, end) if start <= end else {}
+            snapshots = {day: snapshot for day, snapshot in snapshots.items() if day <= last_finished}
+            self._append(snapshots)
+
+            # Metrics are computed only for complete days that do not have them yet; days without a full
+            # year behind them are never saved, so no placeholder row can stick
+            done = set(self.metrics.index) if not self.metrics.empty else set()
+            rows = {}
+            for position in range(BREADTH_YEAR - 1, len(self.closes)):
+                day = self.closes.index[position]
+                if day in done:
+                    continue
+                window = slice(position - BREADTH_YEAR + 1, position + 1)
+                rows[day] = breadth_metrics(self.closes.iloc[window], self.volumes.iloc[window])
+            if rows:
+                self.metrics = pd.concat([self.metrics, pd.DataFrame.from_dict(rows, orient="index")]).sort_index()
+            if snapshots or rows:
+                self._save(snapshots)
+            # New rows only ever need the last year, so older snapshots stay on disk and out of memory
+            self.closes = self.closes.iloc[-self.lookback_sessions:]
+            self.volumes = self.volumes.iloc[-self.lookback_sessions:]
+            return self.metrics.copy()
+
+
+def frame_to_json(df):
+    return df.to_json(orient="split", date_format="iso", force_ascii=False)
+
+
+def frame_from_json(text):
+    df = pd.read_json(io.StringIO(text), orient="split", convert_dates=False)
+    df.index = pd.to_datetime(df.index)
+    return df
+
+
+class LocalDataSource:
+    # Talks to pykrx and Yahoo from this process through the shared history cache
+    def __init__(self, cache=None):
+        self.cache = cache or history_cache
+        self.breadth_stores = {}
+
+    def get(self, market, ticker, start, end):
+        return self.cache.get(market, ticker, start, end)
+
+    def get_many(self, symbols, start, end):
+        return self.cache.get_many(symbols, start, end)
+
+    def get_resampled(self, market, ticker, rule, start, end):
+        return self.cache.get_resampled(market, ticker, rule, start, end)
+
+    def symbols(self, market):
+        return list_symbols(market)
+
+    def quote(self, market, ticker):
+        return fetch_quote(market, ticker, self.cache)
+
+    def snapshot(self, symbols):
+        return snapshot_quotes(symbols)
+
+    def profiles(self, symbols):
+        return fetch_profiles(symbols)
+
+    def breadth(self, market):
+        # One store per known market, so the stores stay bounded however the market is spelled
+        if market not in KRX_MARKETS + US_MARKETS:
+            raise ValueError(f"Unknown market {market}")
+        if market not in self.breadth_stores:
+            self.breadth_stores[market] = BreadthStore(market)
+        return self.breadth_stores[market].update()
+
+    def decliners(self, markets, period):
+        if len(markets) == 1:
+            return scan_market(markets[0], period)
+        return scan_markets(markets, period)
+
+
+class RemoteDataSource:
+    # Same interface as LocalDataSource, served by data_service.py
+    def __init__(self, base_url, timeout=120, max_workers=8):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+    def _request(self, path, **params):
+        url = f"{self.base_url}{path}?{urllib.parse.urlencode(params)}"
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            return response.read().decode("utf-8")
+
+    def get(self, market, ticker, start, end):
+        text = self._request("/history", market=market, ticker=ticker,
+                             start=to_date(start).isoformat(), end=to_date(end).isoformat())
+        return frame_from_json(text)
+
+    def get_many(self, symbols, start, end):
+        def load(symbol):
+            try:
+                return self.get(symbol[0], symbol[1], start, end)
+            except Exception as e:
+                print(f"Error fetching {symbol[1]}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            frames = list(executor.map(load, symbols))
+        return dict(zip(symbols, frames))
+
+    def get_resampled(self, market, ticker, rule, start, end):
+        return None
+
+    def symbols(self, market):
+        return [tuple(pair) for pair in json.loads(self._request("/symbols", market=market))]
+
+    def quote(self, market, ticker):
+        return json.loads(self._request("/quote", market=market, ticker=ticker))
+
+    def snapshot(self, symbols):
+        rows = json.loads(self._request("/snapshot", symbols=",".join(f"{market}:{ticker}" for market, ticker in symbols)))
+        return {(row["market"], row["ticker"]): row["quote"] for row in rows}
+
+    def breadth(self, market):
+        return frame_from_json(self._request("/breadth", market=market))
+
+    def profiles(self, symbols):
+        rows = json.loads(self._request("/profiles", symbols=",".join(f"{market}:{ticker}" for market, ticker in symbols)))
+        return {(row["market"], row["ticker"]): row["profile"] for row in rows}
+
+    def decliners(self, markets, period):
+        return [tuple(row) for row in json.loads(self._request("/decliners", markets=",".join(markets), period=period))]
+
+
+def create_data_source():
+    # STOCK_WORKS_DATA_SERVICE=http://host:port points the app at a shared data service
+    url = os.environ.get("STOCK_WORKS_DATA_SERVICE")
+    if url:
+        return RemoteDataSource(url)
+    return LocalDataSource()
+
+
+def ohlc_columns(market):
+    if market in KRX_MARKETS:
+        return ('시가', '고가', '저가', '종가', '거래량')
+    return ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+RESOLUTIONS = {"D": None, "W": "W-FRI", "M": "ME"}
+
+
+def resample_ohlcv(df, market, rule):
+    if rule is None or df.empty:
+        return df
+    open_col, high_col, low_col, close_col, volume_col = ohlc_columns(market)
+    aggregated = df[[open_col, high_col, low_col, close_col, volume_col]].resample(rule).agg(
+        {open_col: "first", high_col: "max", low_col: "min", close_col: "last", volume_col: "sum"})
+    aggregated = aggregated.dropna(subset=[close_col])
+    # Label each bar with its last trading day so partial periods slice like daily bars
+    last_dates = df.index.to_series().resample(rule).last()
+    aggregated.index = pd.DatetimeIndex(last_dates.reindex(aggregated.index).to_numpy())
+    return aggregated
+
+
+RESOLUTION_PERIODS = {"W-FRI": "W-FRI", "ME": "M"}
+
+
+def last_period_bar(df, market, rule):
+    # The newest bar resample_ohlcv would build, from the rows of its own period only (a month is at most 23 sessions)
+    if rule is None:
+        return df.iloc[-1]
+    tail = df.iloc[-31:]
+    periods = tail.index.to_period(RESOLUTION_PERIODS[rule])
+    rows = tail[periods == periods[-1]]
+    open_col, high_col, low_col, close_col, volume_col = ohlc_columns(market)
+    return pd.Series({open_col: rows[open_col].iloc[0], high_col: rows[high_col].max(), low_col: rows[low_col].min(),
+                      close_col: rows[close_col].iloc[-1], volume_col: rows[volume_col].sum()}, name=rows.index[-1])
+
+
+def choose_resolution(daily_bars, width_px, min_px_per_bar=3):
+    # Pick the finest resolution that still leaves every bar a few pixels wide
+    max_bars = max(width_px // min_px_per_bar, 1)
+    if daily_bars <= max_bars:
+        return "D"
+    if daily_bars / 5 <= max_bars:
+        return "W"
+    return "M"
+
+
+class BarBuffer:
+    # Growable column arrays behind a DataFrame view, so appending a bar never copies the history
+    def __init__(self, columns, dtypes, capacity=256):
+        self.columns = list(columns)
+        self.size = 0
+        self.dates = np.empty(capacity, dtype="datetime64[ns]")
+        self.arrays = {col: np.zeros(capacity, dtype=dtype) for col, dtype in zip(self.columns, dtypes)}
+        self.derived = {}
+
+    @classmethod
+    def from_frame(cls, df, headroom=256):
+        buffer = cls(df.columns, [df[col].dtype if df[col].dtype.kind in "iuf" else np.float64 for col in df.columns],
+                     capacity=len(df) + headroom)
+        buffer.size = len(df)
+        buffer.dates[:len(df)] = df.index.values
+        for col in df.columns:
+            buffer.arrays[col][:len(df)] = df[col].to_numpy()
+        return buffer
+
+    @property
+    def capacity(self):
+        return len(self.dates)
+
+    def _grow(self):
+        # Doubling keeps appends amortized O(1)
+        new_capacity = self.capacity * 2
+        dates = np.empty(new_capacity, dtype=self.dates.dtype)
+        dates[:self.size] = self.dates[:self.size]
+        self.dates = dates
+        for name, store in (("arrays", self.arrays), ("derived", self.derived)):
+            for col, values in store.items():
+                grown = np.zeros(new_capacity, dtype=values.dtype)
+                grown[:self.size] = values[:self.size]
+                store[col] = grown
+
+    def add_derived(self, name, values):
+        array = np.full(self.capacity, np.nan)
+        array[:self.size] = values
+        self.derived[name] = array
+
+    def apply(self, timestamp, values):
+        # Revise the last bar if it has the same date, otherwise append; returns True on append
+        timestamp = np.datetime64(pd.Timestamp(timestamp).normalize(), "ns")
+        appended = self.size == 0 or timestamp > self.dates[self.size - 1]
+        if appended:
+            if self.size == self.capacity:
+                self._grow()
+            self.dates[self.size] = timestamp
+            for col in self.columns:
+                self.arrays[col][self.size] = 0
+            for array in self.derived.values():
+                array[self.size] = np.nan
+            self.size += 1
+        for col, value in values.items():
+            if col in self.arrays:
+                self.arrays[col][self.size - 1] = value
+        return appended
+
+    def rolling_tail(self, col, window):
+        if self.size < window:
+            return np.nan
+        return float(self.arrays[col][self.size - window:self.size].mean())
+
+    def rolling_std_tail(self, col, window):
+        # Sample standard deviation, matching pandas rolling().std()
+        if self.size < window:
+            return np.nan
+        return float(self.arrays[col][self.size - window:self.size].std(ddof=1))
+
+    def rsi_tail(self, col, period=14):
+        # Simple averages of the last period changes, matching MainWindow.calculate_rsi
+        if self.size <= period:
+            return np.nan
+        changes = np.diff(self.arrays[col][self.size - period - 1:self.size].astype(float))
+        gain = changes[changes > 0].sum() / period
+        loss = -changes[changes < 0].sum() / period
+        if loss == 0:
+            return 100.0 if gain > 0 else np.nan
+        return 100 - 100 / (1 + gain / loss)
+
+    def ewm_tail(self, name, value, span):
+        # adjust=False EWM: the newest value only depends on the previous bar's, so a revised bar is cheap
+        array = self.derived[name]
+        n = self.size
+        previous = array[n - 2] if n > 1 else np.nan
+        array[n - 1] = value if np.isnan(previous) else previous + 2.0 / (span + 1) * (value - previous)
+        return array[n - 1]
+
+    def frame(self):
+        n = self.size
+        return pd.DataFrame({col: self.arrays[col][:n] for col in self.columns},
+                            index=pd.DatetimeIndex(self.dates[:n]), copy=False)
+
+
+class SimulatedQuoteFeed:
+    # Offline random walk that builds today's bar tick by tick
+    def __init__(self, market, last_close, seed=None, volatility=0.002, ticks_per_day=60):
+        self.columns = ohlc_columns(market)
+        self.rng = np.random.default_rng(seed)
+        self.volatility = volatility
+        self.ticks_per_day = ticks_per_day
+        self.ticks = 0
+        self.price = float(last_close)
+        self.bar = None
+        self.day = pd.Timestamp(datetime.date.today())
+
+    def poll(self):
+        # Roll into a new session now and then so appends get exercised as well as revisions
+        if self.ticks_per_day and self.ticks and self.ticks % self.ticks_per_day == 0:
+            self.day += pd.Timedelta(days=1)
+            self.bar = None
+        self.ticks += 1
+        self.price *= float(np.exp(self.rng.normal(0, self.volatility)))
+        volume = int(self.rng.integers(100, 10000))
+        open_col, high_col, low_col, close_col, volume_col = self.columns
+        if self.bar is None:
+            self.bar = {open_col: self.price, high_col: self.price, low_col: self.price, close_col: self.price, volume_col: 0}
+        self.bar[high_col] = max(self.bar[high_col], self.price)
+        self.bar[low_col] = min(self.bar[low_col], self.price)
+        self.bar[close_col] = self.price
+        self.bar[volume_col] += volume
+        return self.day, dict(self.bar)
+
+
+class MarketQuoteFeed:
+    # Polls the provider for today's running daily bar
+    def __init__(self, market, ticker):
+        self.market = market
+        self.ticker = ticker
+        self.columns = ohlc_columns(market)
+
+    def poll(self):
+        today = datetime.date.today()
+        if self.market in KRX_MARKETS:
+            df = stock.get_market_ohlcv(today.strftime("%Y%m%d"), today.strftime("%Y%m%d"), self.ticker)
+            if df.empty:
+                return None
+            row = df.iloc[-1]
+            return df.index[-1], {col: row[col] for col in self.columns}
+        df = yf.Ticker(self.ticker).history(period="1d", interval="1m")
+        if df.empty:
+            return None
+        open_col, high_col, low_col, close_col, volume_col = self.columns
+        bar = {open_col: df['Open'].iloc[0], high_col: df['High'].max(), low_col: df['Low'].min(),
+               close_col: df['Close'].iloc[-1], volume_col: df['Volume'].sum()}
+        return pd.Timestamp(df.index[-1].date()), bar
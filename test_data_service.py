@@ -0,0 +1,93 @@
+import time
+import threading
+import unittest
+import data_service
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_size_bound_evicts_least_recently_used(self):
+        cache = data_service.ResponseCache(max_entries=2)
+        cache.put("a", "A", 60)
+        cache.put("b", "B", 60)
+        cache.get("a")
+        cache.put("c", "C", 60)
+        self.assertEqual(cache.get("a"), "A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_expired_entries_are_swept_without_being_requested(self):
+        cache = data_service.ResponseCache(sweep_interval=0)
+        cache.put("old", "stale", -1)
+        cache.put("new", "fresh", 60)
+        self.assertEqual(len(cache), 1)
+
+
+class DataServiceParamsTest(unittest.TestCase):
+    def test_missing_params_are_reported_before_routing(self):
+        service = data_service.DataService(source=object())
+        self.assertEqual(service.missing_params("/history", {"market": "NYSE", "ticker": "AAPL"}), ["start", "end"])
+        self.assertEqual(service.missing_params("/quote", {"market": "NYSE", "ticker": "AAPL"}), [])
+
+    def test_malformed_values_are_invalid(self):
+        service = data_service.DataService(source=object())
+        params = {"market": "NYSE", "ticker": "AAPL", "start": "2024-13-01", "end": "2024-12-31"}
+        self.assertEqual(service.invalid_params("/history", params), ["start"])
+        params = {"market": "NYSE", "ticker": "AAPL", "start": "2025-01-01", "end": "2024-12-31"}
+        self.assertEqual(service.invalid_params("/history", params), ["start"])
+        self.assertEqual(service.invalid_params("/breadth", {"market": "TSE"}), ["market"])
+        self.assertEqual(service.invalid_params("/decliners", {"markets": "KOSPI,NYSE"}), [])
+
+
+class SlowSource:
+    # Every quote takes a while, so concurrent identical requests overlap
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+        self._lock = threading.Lock()
+
+    def quote(self, market, ticker):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.2)
+        if self.error:
+            raise self.error
+        return {"price": 1.0}
+
+
+class CoalescerTest(unittest.TestCase):
+    def run_concurrently(self, service, count=8):
+        barrier = threading.Barrier(count)
+        outcomes = []
+
+        def request():
+            barrier.wait()
+            try:
+                outcomes.append(service.handle("/quote", {"market": "NYSE", "ticker": "AAPL"}))
+            except Exception as e:
+                outcomes.append(e)
+
+        threads = [threading.Thread(target=request) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_identical_requests_share_one_upstream_call(self):
+        source = SlowSource()
+        outcomes = self.run_concurrently(data_service.DataService(source=source))
+        self.assertEqual(source.calls, 1)
+        self.assertEqual(set(outcomes), {'{"price": 1.0}'})
+
+    def test_upstream_error_reaches_every_waiter_once(self):
+        source = SlowSource(error=RuntimeError("upstream down"))
+        service = data_service.DataService(source=source)
+        outcomes = self.run_concurrently(service)
+        self.assertEqual(source.calls, 1)
+        self.assertTrue(all(isinstance(outcome, RuntimeError) for outcome in outcomes))
+        self.assertEqual(len(outcomes), 8)
+        self.assertEqual(len(service.responses), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import time
+import datetime
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import market_data
+
+
+class RecordingFetcher:
+    # Daily Yahoo-style bars for every business day in the range, remembering each request
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, market, ticker, start, end):
+        self.calls.append((start, end))
+        dates = pd.bdate_range(start, end)
+        return pd.DataFrame({"Close": range(len(dates)), "Volume": 1.0}, index=dates)
+
+
+class HistoryCacheTest(unittest.TestCase):
+    def test_disjoint_requests_keep_the_span_contiguous(self):
+        fetcher = RecordingFetcher()
+        cache = market_data.HistoryCache(fetcher=fetcher)
+        cache.get("NYSE", "AAPL", datetime.date(2024, 1, 1), datetime.date(2024, 6, 30))
+        cache.get("NYSE", "AAPL", datetime.date(2025, 1, 1), datetime.date(2025, 6, 30))
+        df = cache.get("NYSE", "AAPL", datetime.date(2024, 7, 1), datetime.date(2024, 12, 31))
+        self.assertEqual(len(df), len(pd.bdate_range("2024-07-01", "2024-12-31")))
+        self.assertEqual(fetcher.calls[1], (datetime.date(2024, 7, 1), datetime.date(2025, 6, 30)))
+        self.assertEqual(len(fetcher.calls), 2)
+
+    def test_request_before_the_span_fetches_up_to_it(self):
+        fetcher = RecordingFetcher()
+        cache = market_data.HistoryCache(fetcher=fetcher)
+        cache.get("NYSE", "AAPL", datetime.date(2025, 1, 1), datetime.date(2025, 6, 30))
+        cache.get("NYSE", "AAPL", datetime.date(2024, 1, 1), datetime.date(2024, 6, 30))
+        self.assertEqual(fetcher.calls[1], (datetime.date(2024, 1, 1), datetime.date(2024, 12, 31)))
+        df = cache.get("NYSE", "AAPL", datetime.date(2024, 7, 1), datetime.date(2024, 12, 31))
+        self.assertFalse(df.empty)
+        self.assertEqual(len(fetcher.calls), 2)
+
+    def test_least_recently_used_ticker_is_evicted_over_the_byte_limit(self):
+        fetcher = RecordingFetcher()
+        start, end = datetime.date(2024, 1, 1), datetime.date(2024, 12, 31)
+        one_ticker = int(fetcher("NYSE", "AAPL", start, end).memory_usage(deep=True).sum())
+        cache = market_data.HistoryCache(fetcher=fetcher, max_bytes=2 * one_ticker)
+        for ticker in ("AAPL", "MSFT", "AAPL", "IBM"):
+            cache.get("NYSE", ticker, start, end)
+        self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+        self.assertEqual(cache.missing_ranges("NYSE", "MSFT", start, end), [(start, end)])
+        self.assertEqual(cache.missing_ranges("NYSE", "AAPL", start, end), [])
+
+
+class RebaseClosesTest(unittest.TestCase):
+    def test_series_are_rebased_on_the_first_common_date(self):
+        a = pd.DataFrame({"Close": [10.0, 11.0, 12.0]}, index=pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]))
+        b = pd.DataFrame({"Close": [50.0, 40.0]}, index=pd.to_datetime(["2024-01-02", "2024-01-03"]))
+        rebased = market_data.rebase_closes({"A": ("NYSE", a), "B": ("NYSE", b)})
+        self.assertEqual(rebased.index[0], pd.Timestamp("2024-01-02"))
+        self.assertEqual(list(rebased.iloc[0]), [100.0, 100.0])
+        self.assertAlmostEqual(rebased["A"].iloc[-1], 12.0 / 11.0 * 100)
+        self.assertAlmostEqual(rebased["B"].iloc[-1], 80.0)
+
+    def test_series_that_ends_early_is_not_extended(self):
+        a = pd.DataFrame({"Close": [10.0, 11.0, 12.0]}, index=pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-04"]))
+        b = pd.DataFrame({"Close": [50.0, 40.0]}, index=pd.to_datetime(["2024-01-01", "2024-01-03"]))
+        rebased = market_data.rebase_closes({"A": ("NYSE", a), "B": ("NYSE", b)})
+        self.assertAlmostEqual(rebased.loc["2024-01-03", "A"], 110.0)
+        self.assertTrue(pd.isna(rebased.loc["2024-01-04", "B"]))
+
+
+class LastFinishedSessionTest(unittest.TestCase):
+    def test_us_session_is_open_during_the_korean_night(self):
+        # 02:00 KST on the 11th is 13:00 EDT on the 10th
+        now = datetime.datetime(2024, 7, 11, 2, 0, tzinfo=market_data.MARKET_SESSIONS["KRX"][0])
+        self.assertEqual(market_data.last_finished_session("NYSE", now), datetime.date(2024, 7, 9))
+        self.assertEqual(market_data.last_finished_session("KOSPI", now), datetime.date(2024, 7, 10))
+
+    def test_session_is_finished_after_the_close(self):
+        now = datetime.datetime(2024, 7, 10, 17, 0, tzinfo=market_data.MARKET_SESSIONS["US"][0])
+        self.assertEqual(market_data.last_finished_session("NASDAQ", now), datetime.date(2024, 7, 10))
+
+
+class QuoteCacheTest(unittest.TestCase):
+    def test_missing_sector_is_cached_until_it_expires(self):
+        cache = market_data.QuoteCache()
+        cache.put("NYSE", "SPY", {"name": "SPDR S&P 500 ETF", "sector": None})
+        values, stale = cache.get("NYSE", "SPY")
+        self.assertNotIn("sector", values)
+        self.assertNotIn("sector", stale)
+        cache.put("NYSE", "SPY", {"sector": None}, fetched_at=time.monotonic() - market_data.QUOTE_FIELD_TTLS["sector"] - 1)
+        self.assertIn("sector", cache.get("NYSE", "SPY")[1])
+
+
+def random_snapshots(market, start, end, tickers=50):
+    dates = pd.bdate_range(start, end)
+    rng = np.random.default_rng(0)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), tickers)), axis=0))
+    names = [f"{i:06d}" for i in range(tickers)]
+    return {day.date(): pd.DataFrame({"close": closes[i], "volume": 1000.0}, index=names) for i, day in enumerate(dates)}
+
+
+class BreadthTest(unittest.TestCase):
+    def test_short_history_has_no_highs_or_lows(self):
+        snapshots = random_snapshots("KOSPI", "2024-01-01", "2024-03-29")
+        closes = pd.DataFrame({pd.Timestamp(day): snapshot["close"] for day, snapshot in snapshots.items()}).T
+        row = market_data.breadth_metrics(closes, closes * 0 + 1000.0)
+        self.assertTrue(np.isnan(row["new_highs"]))
+        self.assertTrue(np.isnan(row["new_lows"]))
+
+    def test_store_keeps_only_complete_days(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = market_data.BreadthStore("KOSPI", root=root, fetcher=random_snapshots)
+            metrics = store.update(datetime.date(2024, 12, 31))
+            self.assertGreaterEqual(len(metrics), 120)
+            self.assertFalse(metrics[["new_highs", "new_lows"]].isna().any().any())
+            self.assertLessEqual(len(store.closes), store.lookback_sessions)
+            reloaded = market_data.BreadthStore("KOSPI", root=root, fetcher=random_snapshots)
+            self.assertEqual(metrics.index[0], reloaded.first_complete_day())
+            self.assertEqual(len(reloaded.metrics), len(metrics))
+
+
+class LiveTailTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        index = pd.bdate_range("2024-01-01", "2024-06-28")
+        close = 100 + rng.normal(0, 1, len(index)).cumsum()
+        self.df = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                                "Volume": rng.integers(1000, 2000, len(index)).astype(float)}, index=index)
+
+    def test_tails_match_full_recompute(self):
+        buffer = market_data.BarBuffer.from_frame(self.df.iloc[:-1])
+        closes = self.df["Close"]
+        for name, span in (("ema_short", 12), ("ema_long", 26)):
+            buffer.add_derived(name, closes.iloc[:-1].ewm(span=span, adjust=False).mean().to_numpy())
+        buffer.apply(self.df.index[-1], self.df.iloc[-1].to_dict())
+        delta = closes.diff()
+        gain = delta.where(delta > 0, 0).rolling(14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        self.assertAlmostEqual(buffer.rolling_std_tail("Close", 20), closes.rolling(20).std().iloc[-1])
+        self.assertAlmostEqual(buffer.rsi_tail("Close"), (100 - 100 / (1 + gain / loss)).iloc[-1])
+        for name, span in (("ema_short", 12), ("ema_long", 26)):
+            self.assertAlmostEqual(buffer.ewm_tail(name, closes.iloc[-1], span), closes.ewm(span=span, adjust=False).mean().iloc[-1])
+
+    def test_last_period_bar_matches_resample(self):
+        for rule in ("W-FRI", "ME"):
+            expected = market_data.resample_ohlcv(self.df, "NASDAQ", rule).iloc[-1]
+            bar = market_data.last_period_bar(self.df, "NASDAQ", rule)
+            self.assertEqual(bar.name, expected.name)
+            pd.testing.assert_series_equal(bar[expected.index], expected, check_names=False, check_dtype=False)
+
+
+class ScanMarketTest(unittest.TestCase):
+    def test_injected_fetch_and_listing(self):
+        fetcher = RecordingFetcher()
+        listing = [(f"Company {i}", f"T{i}") for i in range(50)]
+        today = datetime.datetime(2024, 12, 31)
+        results = market_data.scan_markets(["NYSE", "NASDAQ"], "1 Month", limit=5, fetch=lambda *args: fetcher(*args) + 1.0,
+                                           lister=lambda market: listing, today=today)
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len(fetcher.calls), 10)
+        self.assertEqual({market for name, ticker, change, market in results}, {"NYSE", "NASDAQ"})
+        self.assertEqual([r[2] for r in results], sorted(r[2] for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import json
+import tempfile
+import unittest
+import watchlist
+
+
+class WatchlistStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "watchlist.db")
+        self.store = watchlist.WatchlistStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_add_and_remove_persist(self):
+        self.assertTrue(self.store.add("Tech", "NASDAQ", "AAPL", "Apple Inc."))
+        self.assertTrue(self.store.add("Tech", "KOSPI", "005930", "삼성전자"))
+        self.assertTrue(self.store.remove("Tech", "AAPL"))
+        self.assertFalse(self.store.remove("Tech", "AAPL"))
+        self.store.close()
+        self.store = watchlist.WatchlistStore(self.path)
+        self.assertEqual(self.store.entries("Tech"), [("KOSPI", "005930", "삼성전자")])
+
+    def test_duplicates_are_added_once(self):
+        self.assertTrue(self.store.add("Tech", "NASDAQ", "AAPL", "Apple Inc."))
+        self.assertFalse(self.store.add("Tech", "NASDAQ", "AAPL", "Apple Inc."))
+        added = self.store.add_many("Tech", [("NYSE", "IBM", "IBM"), ("NYSE", "IBM", "IBM"), ("NASDAQ", "AAPL", "Apple Inc.")])
+        self.assertEqual(added, 1)
+        self.assertEqual([ticker for market, ticker, name in self.store.entries("Tech")], ["AAPL", "IBM"])
+
+    def test_import_resolves_markets_and_keeps_order(self):
+        path = os.path.join(self.directory.name, "selected.json")
+        with open(path, "w") as f:
+            json.dump(["Apple Inc. (AAPL)", "삼성전자 (005930)", "Apple Inc. (AAPL)"], f)
+        markets = {"AAPL": "NASDAQ", "005930": "KOSPI"}
+        self.assertEqual(self.store.import_json(path, markets.get), 2)
+        self.assertEqual(self.store.entries(watchlist.DEFAULT_GROUP),
+                         [("NASDAQ", "AAPL", "Apple Inc."), ("KOSPI", "005930", "삼성전자")])
+        self.assertEqual(self.store.import_json(os.path.join(self.directory.name, "missing.json")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
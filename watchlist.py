@@ -0,0 +1,120 @@
+import json
+import sqlite3
+import threading
+import market_data
+
+DEFAULT_GROUP = "Default"
+
+
+class WatchlistStore:
+    # Named groups of (market, ticker, name) in SQLite, mirrored in dicts for O(1) membership
+    def __init__(self, path="watchlist.db"):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self.conn:
+            self.conn.execute("PRAGMA foreign_keys = ON")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS groups (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                group_id INTEGER NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+                market TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                name TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (group_id, ticker))""")
+        self._group_ids = {}
+        self._members = {}
+        for group_id, name in self.conn.execute("SELECT id, name FROM groups ORDER BY id"):
+            self._group_ids[name] = group_id
+            self._members[name] = {}
+        rows = self.conn.execute("SELECT g.name, e.market, e.ticker, e.name FROM entries e JOIN groups g ON g.id = e.group_id "
+                                 "ORDER BY e.group_id, e.position")
+        for group, market, ticker, name in rows:
+            self._members[group][ticker] = (market, ticker, name)
+
+    def is_empty(self):
+        return not self._group_ids
+
+    def groups(self):
+        return list(self._group_ids)
+
+    def create_group(self, group):
+        with self._lock:
+            if group in self._group_ids:
+                return False
+            with self.conn:
+                cursor = self.conn.execute("INSERT INTO groups (name) VALUES (?)", (group,))
+            self._group_ids[group] = cursor.lastrowid
+            self._members[group] = {}
+            return True
+
+    def delete_group(self, group):
+        with self._lock:
+            group_id = self._group_ids.pop(group, None)
+            if group_id is None:
+                return False
+            with self.conn:
+                self.conn.execute("DELETE FROM entries WHERE group_id = ?", (group_id,))
+                self.conn.execute("DELETE FROM groups WHERE id = ?", (group_id,))
+            del self._members[group]
+            return True
+
+    def entries(self, group):
+        return list(self._members.get(group, {}).values())
+
+    def contains(self, group, ticker):
+        return ticker in self._members.get(group, {})
+
+    def add(self, group, market, ticker, name):
+        return self.add_many(group, [(market, ticker, name)]) == 1
+
+    def add_many(self, group, entries):
+        # One transaction for the whole batch; returns how many were new
+        if group not in self._group_ids:
+            self.create_group(group)
+        with self._lock:
+            members = self._members[group]
+            new_entries = {}
+            for market, ticker, name in entries:
+                if ticker not in members and ticker not in new_entries:
+                    new_entries[ticker] = (market, ticker, name)
+            new_entries = list(new_entries.values())
+            if not new_entries:
+                return 0
+            group_id = self._group_ids[group]
+            position = self.conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM entries WHERE group_id = ?",
+                                         (group_id,)).fetchone()[0]
+            with self.conn:
+                self.conn.executemany("INSERT INTO entries (group_id, market, ticker, name, position) VALUES (?, ?, ?, ?, ?)",
+                                      [(group_id, market, ticker, name, position + i)
+                                       for i, (market, ticker, name) in enumerate(new_entries)])
+            for entry in new_entries:
+                members[entry[1]] = entry
+            return len(new_entries)
+
+    def remove(self, group, ticker):
+        with self._lock:
+            members = self._members.get(group)
+            if members is None or ticker not in members:
+                return False
+            with self.conn:
+                self.conn.execute("DELETE FROM entries WHERE group_id = ? AND ticker = ?", (self._group_ids[group], ticker))
+            del members[ticker]
+            return True
+
+    def import_json(self, path, resolve_market=market_data.market_for_symbol, group=DEFAULT_GROUP):
+        # One-time migration from the old selected.json list of "name (ticker)" strings
+        try:
+            with open(path, "r") as f:
+                items = json.load(f)
+        except FileNotFoundError:
+            items = []
+        entries = []
+        for text in items:
+            name, _, ticker = text.rpartition("(")
+            ticker = ticker.replace(")", "").strip()
+            entries.append((resolve_market(ticker), ticker, name.strip()))
+        self.create_group(group)
+        return self.add_many(group, entries)
+
+    def close(self):
+        self.conn.close()